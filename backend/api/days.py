@@ -1,25 +1,109 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Request, HTTPException
 from sqlalchemy.orm import Session
-from models import Day
+from sqlalchemy import select
+from models import Day, DayBonus, Item, ColumnLocationEnum
 from db import get_db
+from utils.etag import cached_json_response
+from utils.dates import parse_day, day_range
+from utils.days import (day_row, upsert_days, ensure_days, day_summary, claim_bonus, rollover_day,
+                        PLANNING_BONUS, PLANNING_BONUS_XP)
+from utils.stats import collect_stats, apply_stats
+from schemas import DayOut, schema_columns, rows_as_dicts
 import datetime
+import uuid
 
 router = APIRouter(prefix="/days")
 
-@router.get("")
-def get_days(db: Session = Depends(get_db)):
-    return db.query(Day).all()
+MAX_DAY_RANGE = 1000
+DAY_COLUMNS = schema_columns(DayOut, Day)
 
-@router.post("")
-async def create_day(day: dict, db: Session = Depends(get_db)):
+@router.get("", response_model=list[DayOut])
+def get_days(request: Request, db: Session = Depends(get_db)):
+    return cached_json_response(request, db, ["days"], lambda: rows_as_dicts(db.query(*DAY_COLUMNS)))
+
+@router.post("", response_model=DayOut)
+def create_day(day: dict, db: Session = Depends(get_db)):
     # Parse date string to datetime object if needed
     if isinstance(day.get("date"), str):
         try:
             day["date"] = datetime.datetime.fromisoformat(day["date"])
         except Exception:
             day["date"] = datetime.datetime.utcnow()
-    new_day = Day(**day)
-    db.add(new_day)
+    if not day.get("id"):
+        raise HTTPException(status_code=400, detail="id is required")
+    # Creating a day that already exists is a no-op, so concurrent callers don't collide
+    upsert_days(db, [day_row(day["id"], day.get("date"))])
+    db.commit()
+    return db.get(Day, day["id"])
+
+@router.post("/range")
+def create_day_range(body: dict = Body(...), db: Session = Depends(get_db)):
+    """Make sure a Day exists for every date from body["from"] to body["to"] inclusive.
+
+    Existing days are kept as they are; returns the ids of the whole range.
+    """
+    start = parse_day(body.get("from"), "from")
+    end = parse_day(body.get("to"), "to")
+    if end < start:
+        raise HTTPException(status_code=400, detail="to must not be before from")
+    dates = day_range(start, end)
+    if len(dates) > MAX_DAY_RANGE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DAY_RANGE} days per request")
+    day_ids = [date.isoformat() for date in dates]
+    upsert_days(db, [day_row(day_id) for day_id in day_ids])
+    db.commit()
+    return {"days": day_ids}
+
+@router.get("/{day_id}/summary")
+def get_day_summary(day_id: str, db: Session = Depends(get_db)):
+    """Planned vs actual minutes of a day and whether its planning bonus can be claimed."""
+    return day_summary(db, parse_day(day_id))
+
+@router.post("/{day_id}/rollover")
+def rollover(day_id: str, body: dict = Body(default={}), db: Session = Depends(get_db)):
+    """Move the unfinished plan tasks of a day to body["to"] (default: the next day).
+
+    With body["mode"] = "copy" the tasks are copied instead, and copying twice is a no-op.
+    """
+    date = parse_day(day_id)
+    target = parse_day(body["to"], "to") if body.get("to") else date + datetime.timedelta(days=1)
+    mode = body.get("mode") or "move"
+    if mode not in ("move", "copy"):
+        raise HTTPException(status_code=400, detail="mode must be move or copy")
+    if target == date:
+        raise HTTPException(status_code=400, detail="to must be another day")
+    count = rollover_day(db, date.isoformat(), target.isoformat(), copy=mode == "copy")
+    db.commit()
+    return {"from": date.isoformat(), "to": target.isoformat(), "mode": mode, "count": count}
+
+@router.post("/{day_id}/bonuses/{bonus_id}")
+def award_bonus(day_id: str, bonus_id: str, body: dict = Body(default={}), db: Session = Depends(get_db)):
+    """Award a bonus for a day at most once (repeatable bonuses every time), creating
+    the bonus item that carries body["xp"].
+
+    Claiming it again returns awarded=false with the existing item id. The
+    planning bonus is checked here (409 when not earned) and has a fixed XP.
+    """
+    date = parse_day(day_id)
+    if bonus_id == PLANNING_BONUS:
+        if not day_summary(db, date)["planning_bonus"]["eligible"]:
+            raise HTTPException(status_code=409, detail="The planning bonus is not earned for this day")
+        xp = PLANNING_BONUS_XP
+    else:
+        xp = body.get("xp", 0)
+        if not isinstance(xp, int) or isinstance(xp, bool):
+            raise HTTPException(status_code=400, detail="xp must be an integer")
+    item = Item(id=str(uuid.uuid4()), type="bonus", day_id=date.isoformat(), description=bonus_id,
+                xp_value=xp, completed=True, column_location=ColumnLocationEnum.fact,
+                completed_time=datetime.datetime.utcnow())
+    if not claim_bonus(db, item.day_id, bonus_id, item.id):
+        db.rollback()
+        existing = db.execute(select(DayBonus.item_id).where(
+            DayBonus.day_id == item.day_id, DayBonus.bonus_id == bonus_id)).scalar()
+        return {"awarded": False, "item_id": existing}
+    ensure_days(db, [item.day_id])
+    db.add(item)
+    apply_stats(db, collect_stats([item]))
     db.commit()
-    db.refresh(new_day)
-    return new_day
+    db.refresh(item)
+    return {"awarded": True, "item_id": item.id, "item": item}
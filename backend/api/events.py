@@ -0,0 +1,57 @@
+import asyncio
+import orjson
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from db import SessionLocal
+from utils.changes import current_revision
+from utils.events import subscription
+
+router = APIRouter(prefix="/events")
+
+# A comment line is sent after this long without events so proxies keep the stream open
+KEEPALIVE_SECONDS = 15
+
+
+def sse(event, data, event_id=None):
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+def _current_revision():
+    with SessionLocal() as db:
+        return current_revision(db)
+
+
+async def event_stream(request):
+    with subscription() as subscriber:
+        # Subscribed first, so nothing committed after this revision is missed
+        revision = await run_in_threadpool(_current_revision)
+        yield sse("ready", {"revision": revision}, revision)
+        while not await request.is_disconnected():
+            try:
+                change = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if subscriber.overflowed:
+                # Fell too far behind: drop the backlog, the client catches up with GET /sync
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.overflowed = False
+                yield sse("resync", {"revision": change["revision"]})
+                continue
+            yield sse("change", change, change["revision"])
+
+
+@router.get("")
+async def events(request: Request):
+    """Server-Sent Events stream of committed changes.
+
+    Starts with a `ready` event holding the current revision; every commit
+    then sends a `change` event with its revision, the changed tables and the
+    ids written/deleted in items, projects and days. A `resync` event means
+    events were dropped and the client should call GET /sync?since=<last revision>.
+    """
+    return StreamingResponse(event_stream(request), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,45 +1,129 @@
-from fastapi import APIRouter, Depends, Body, Query
+from fastapi import APIRouter, Depends, Body, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, insert, select
 from sqlalchemy.orm import Session
-from models import Item, Day, TaskQualityEnum, ColumnLocationEnum, TimeQualityEnum
-from db import get_db
+from typing import Optional
+from models import Item, ItemArchive, TaskQualityEnum, ColumnLocationEnum, TimeQualityEnum
+from db import get_db, SessionLocal
+import csv
 import datetime
-from utils.xp import calculate_xp, get_xp_breakdown
+import enum
+import io
+import orjson
+from utils.xp import calculate_xp, get_xp_breakdown, get_xp_breakdowns, apply_item_xp, release_items_xp
+from utils.dates import parse_day, day_range, day_date
+from utils.stats import collect_stats, apply_stats
+from utils.sql import chunks
+from utils.days import ensure_days, claim_bonus, release_bonuses
+from utils.routines import materialize_routines, materialize_lazily, routine_tasks, ROUTINE_USER
+from utils.etag import cached_json_response
+from utils.item_tree import subtree_rows, nest
+from utils.archive import with_archive, unarchive
+from schemas import ItemOut, schema_columns, rows_as_dicts
+from utils.write_buffer import (BUFFERED_FIELDS, FLUSH_INTERVAL_MS, buffer_write, take_pending,
+                                discard_pending, pending_writes, overlay)
 
 router = APIRouter(prefix="/items")
 
-@router.get("")
-def get_items(db: Session = Depends(get_db)):
-    items = db.query(Item).all()
-    return items
+MAX_PAGE_SIZE = 5000
+MAX_BULK_ITEMS = 10000
+MAX_MATERIALIZE_DAYS = 366
+IN_CLAUSE_CHUNK = 500
+EXPORT_CHUNK = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+BULK_UPDATE_FIELDS = {"column_location", "day_id", "parent_id", "approximate_planned_time",
+                      "description", "full_description"}
+ITEM_FIELDS = [column.name for column in Item.__table__.columns]
+ITEM_COLUMNS = schema_columns(ItemOut, Item)
+# Bookkeeping columns clients may echo back but never set
+SERVER_MANAGED_FIELDS = {"xp_credited", "credited_project_id", "updated_at", "revision", "date"}
 
-@router.get("/breaks")
-def get_breaks(db: Session = Depends(get_db)):
-    breaks = db.query(Item).filter(Item.type == "break").all()
-    return breaks
 
-@router.post("")
-async def create_item(item: dict, db: Session = Depends(get_db)):
+def parse_item_fields(fields):
+    """Turn a comma separated ?fields= value into Item columns (id always included)."""
+    if not fields:
+        return None
+    names = ["id"] + [name.strip() for name in fields.split(",") if name.strip() and name.strip() != "id"]
+    unknown = [name for name in names if name not in ITEM_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return [getattr(Item, name) for name in dict.fromkeys(names)]
+
+
+def filter_items(query, day_from=None, day_to=None, column_location=None, item_type=None,
+                 completed=None, project_id=None, parent_id=None, model=Item):
+    """Apply the GET /items filters to a query over Item or ItemArchive (or their columns)."""
+    # Ranges use the typed date column (index range scans on (date, column_location, type))
+    if day_from:
+        query = query.filter(model.date >= parse_day(day_from, "day_from"))
+    if day_to:
+        query = query.filter(model.date <= parse_day(day_to, "day_to"))
+    if column_location:
+        try:
+            query = query.filter(model.column_location == ColumnLocationEnum(column_location))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid column_location: {column_location}")
+    if item_type:
+        query = query.filter(model.type == item_type)
+    if completed is not None:
+        if completed:
+            query = query.filter(model.completed.is_(True))
+        else:
+            query = query.filter(or_(model.completed.is_(False), model.completed.is_(None)))
+    if project_id:
+        query = query.filter(model.project_id == project_id)
+    if parent_id:
+        query = query.filter(model.parent_id == parent_id)
+    return query
+
+
+def item_dict(item):
+    return {name: getattr(item, name) for name in ITEM_FIELDS}
+
+
+def parse_datetime(value, fallback=None):
+    if isinstance(value, datetime.datetime):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except Exception:
+        return fallback
+
+
+def parse_planned_time(value):
+    """Turn a time string like "14:30" into today's datetime at that time (None if empty/invalid)."""
+    if not value:
+        return None
+    try:
+        hour, minute = map(int, value.split(':'))
+        return datetime.datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except Exception:
+        return None
+
+
+def prepare_item(item):
+    """Normalize an incoming item dict in place the way POST /items stores it.
+
+    Raises ValueError for unknown fields and invalid enum values.
+    """
+    for key in SERVER_MANAGED_FIELDS:
+        item.pop(key, None)
+    unknown = [key for key in item if key not in ITEM_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    item["date"] = day_date(item.get("day_id"))
+
     # Handle bonus type: minimal fields, skip XP calculation and project update
     if item.get("type") == "bonus":
-        # Ensure required fields
         from uuid import uuid4
         item.setdefault("id", str(uuid4()))
         item["completed"] = True
-        item["column_location"] = "fact"
-        item.setdefault("completed_time", datetime.datetime.utcnow())
-        # Parse completed_time if present and is a string
-        if "completed_time" in item and item["completed_time"]:
-            if not isinstance(item["completed_time"], datetime.datetime):
-                try:
-                    item["completed_time"] = datetime.datetime.fromisoformat(str(item["completed_time"]).replace('Z', '+00:00'))
-                except Exception:
-                    item["completed_time"] = datetime.datetime.utcnow()
+        item["column_location"] = ColumnLocationEnum.fact
         # No project_id, no XP calculation, just store xp_value
-        new_item = Item(**item)
-        db.add(new_item)
-        db.commit()
-        db.refresh(new_item)
-        return new_item
+        item["completed_time"] = parse_datetime(item.get("completed_time"), datetime.datetime.utcnow())
+        item["planned_time"] = parse_planned_time(item.get("planned_time"))
+        return item
+
     # Parse enums
     if "task_quality" in item and item["task_quality"]:
         item["task_quality"] = TaskQualityEnum(item["task_quality"])
@@ -47,51 +131,22 @@ async def create_item(item: dict, db: Session = Depends(get_db)):
         item["column_location"] = ColumnLocationEnum(item["column_location"])
     if "time_quality" in item and item["time_quality"]:
         item["time_quality"] = TimeQualityEnum(item["time_quality"])
-    
+
     # Parse created_time if present and is a string
     if "created_time" in item and item["created_time"]:
-        if not isinstance(item["created_time"], datetime.datetime):
-            try:
-                item["created_time"] = datetime.datetime.fromisoformat(str(item["created_time"]).replace('Z', '+00:00'))
-            except Exception:
-                item["created_time"] = datetime.datetime.utcnow()
+        item["created_time"] = parse_datetime(item["created_time"], datetime.datetime.utcnow())
     else:
         item["created_time"] = datetime.datetime.utcnow()
-    
-    # Handle planned_time - convert time string to datetime if provided
-    if "planned_time" in item and item["planned_time"]:
-        try:
-            # Parse time string like "14:30" to datetime
-            time_str = item["planned_time"]
-            hour, minute = map(int, time_str.split(':'))
-            # Use today's date as base
-            today = datetime.datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-            item["planned_time"] = today
-        except Exception:
-            item["planned_time"] = None
-    else:
-        item["planned_time"] = None
-    
-    # Handle approximate_planned_time - store as string
-    if "approximate_planned_time" in item and item["approximate_planned_time"]:
-        # Keep as string since it's just "morning", "afternoon", etc.
-        pass
-    else:
+    if item.get("completed_time"):
+        item["completed_time"] = parse_datetime(item["completed_time"])
+
+    # Handle planned_time - a time string like "14:30" becomes today's datetime at that time
+    item["planned_time"] = parse_planned_time(item.get("planned_time"))
+
+    # Handle approximate_planned_time - store as string ("morning", "afternoon", etc.)
+    if not item.get("approximate_planned_time"):
         item["approximate_planned_time"] = None
-    
-    # Ensure Day exists
-    day_id = item.get("day_id")
-    if day_id:
-        day = db.query(Day).filter(Day.id == day_id).first()
-        if not day:
-            try:
-                day_date = datetime.datetime.fromisoformat(day_id)
-            except Exception:
-                day_date = None
-            new_day = Day(id=day_id, date=day_date)
-            db.add(new_day)
-            db.commit()
-    
+
     # If type is daily_basic, force xp_value to 0
     if item.get("type") == "daily_basic":
         item["xp_value"] = 0
@@ -99,100 +154,350 @@ async def create_item(item: dict, db: Session = Depends(get_db)):
     # Handle parent_id
     if "parent_id" not in item:
         item["parent_id"] = None
+    return item
+
+
+@router.get("", response_model=list[ItemOut])
+def get_items(
+    request: Request,
+    day_from: Optional[str] = None,
+    day_to: Optional[str] = None,
+    column_location: Optional[str] = None,
+    item_type: Optional[str] = Query(None, alias="type"),
+    completed: Optional[bool] = None,
+    project_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    columns = parse_item_fields(fields)
+    materialize_lazily(db, day_from, day_to)
+    pending, pending_version = pending_writes()
+
+    def where(stmt, model):
+        stmt = filter_items(stmt, day_from, day_to, column_location, item_type,
+                            completed, project_id, parent_id, model=model)
+        # Keyset pagination: pages are ordered by id and continue after ?cursor=
+        return stmt.filter(model.id > cursor) if limit and cursor else stmt
+
+    def build():
+        # Completed history past the archive horizon is read from items_archive too
+        source = with_archive(db, columns or ITEM_COLUMNS, where, day_from)
+        stmt = select(source)
+        if limit:
+            stmt = stmt.order_by(source.c.id).limit(limit)
+        rows = rows_as_dicts(db.execute(stmt))
+        # Serve buffered PATCH values that are not flushed yet
+        return overlay(rows, pending) if pending else rows
+
+    def next_cursor(content):
+        if limit and len(content) == limit:
+            return {"X-Next-Cursor": content[-1]["id"]}
+        return {}
 
+    extra_versions = {"write_buffer": pending_version} if pending else None
+    return cached_json_response(request, db, ["items"], build, headers=next_cursor,
+                                extra_versions=extra_versions)
+
+def export_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def export_rows(stmt, format):
+    """Yield the export body chunk by chunk straight from column tuples.
+
+    Uses its own session: the response is still streaming after the request's
+    dependency session may have been closed.
+    """
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_CHUNK))
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(ITEM_FIELDS)
+            for rows in result.partitions():
+                writer.writerows([export_value(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield b"".join(orjson.dumps(dict(zip(ITEM_FIELDS, row))) + b"\n" for row in rows)
+
+
+@router.get("/export")
+def export_items(
+    format: str = "ndjson",
+    day_from: Optional[str] = None,
+    day_to: Optional[str] = None,
+    column_location: Optional[str] = None,
+    item_type: Optional[str] = Query(None, alias="type"),
+    completed: Optional[bool] = None,
+    project_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Stream items (archived ones included) as NDJSON or CSV in fixed-size chunks,
+    memory bounded by EXPORT_CHUNK."""
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    source = with_archive(
+        db, [getattr(Item, name) for name in ITEM_FIELDS],
+        lambda stmt, model: filter_items(stmt, day_from, day_to, column_location, item_type, completed,
+                                         project_id, model=model),
+        day_from,
+    )
+    stmt = select(source).order_by(source.c.id)
+    return StreamingResponse(
+        export_rows(stmt, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=items.{format}"},
+    )
+
+@router.get("/breaks", response_model=list[ItemOut])
+def get_breaks(db: Session = Depends(get_db)):
+    breaks = with_archive(db, ITEM_COLUMNS, lambda stmt, model: stmt.filter(model.type == "break"))
+    return rows_as_dicts(db.execute(select(breaks)))
+
+@router.post("", response_model=ItemOut)
+def create_item(item: dict, db: Session = Depends(get_db)):
+    try:
+        prepare_item(item)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # A bonus counts once per day (unless repeatable), however many tabs claim it
+    if item.get("type") == "bonus" and not claim_bonus(db, item.get("day_id"), item.get("description"), item["id"]):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Bonus already awarded for this day")
+    ensure_days(db, [item.get("day_id")])
     new_item = Item(**item)
     db.add(new_item)
+    apply_stats(db, collect_stats([new_item]))
     db.commit()
     db.refresh(new_item)
     return new_item
 
 @router.post("/bulk")
-async def create_items_bulk(items: list = Body(...), db: Session = Depends(get_db)):
-    created_items = []
-    for item in items:
-        # Copy logic from create_item
-        if item.get("type") == "bonus":
-            from uuid import uuid4
-            item.setdefault("id", str(uuid4()))
-            item["completed"] = True
-            item["column_location"] = "fact"
-            item.setdefault("completed_time", datetime.datetime.utcnow())
-            if "completed_time" in item and item["completed_time"]:
-                if not isinstance(item["completed_time"], datetime.datetime):
-                    try:
-                        item["completed_time"] = datetime.datetime.fromisoformat(str(item["completed_time"]).replace('Z', '+00:00'))
-                    except Exception:
-                        item["completed_time"] = datetime.datetime.utcnow()
-            new_item = Item(**item)
-            db.add(new_item)
-            db.commit()
-            db.refresh(new_item)
-            created_items.append(new_item)
+def create_items_bulk(items: list = Body(...), db: Session = Depends(get_db)):
+    """Create many items in one transaction: either every row is stored or none.
+
+    Rows are validated up front; if any fails, the response is 422 with a
+    per-row error list and nothing is written.
+    """
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+    from uuid import uuid4
+    # (request index, row) pairs of the rows that passed validation, so errors point at the request
+    indexed = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Item must be an object")
+            row = prepare_item(dict(item))
+        except (ValueError, TypeError) as e:
+            errors.append({"index": index, "error": str(e)})
             continue
-        if "task_quality" in item and item["task_quality"]:
-            item["task_quality"] = TaskQualityEnum(item["task_quality"])
-        if "column_location" in item and item["column_location"]:
-            item["column_location"] = ColumnLocationEnum(item["column_location"])
-        if "time_quality" in item and item["time_quality"]:
-            item["time_quality"] = TimeQualityEnum(item["time_quality"])
-        if "created_time" in item and item["created_time"]:
-            if not isinstance(item["created_time"], datetime.datetime):
-                try:
-                    item["created_time"] = datetime.datetime.fromisoformat(str(item["created_time"]).replace('Z', '+00:00'))
-                except Exception:
-                    item["created_time"] = datetime.datetime.utcnow()
-        else:
-            item["created_time"] = datetime.datetime.utcnow()
-        if "planned_time" in item and item["planned_time"]:
-            try:
-                time_str = item["planned_time"]
-                hour, minute = map(int, time_str.split(':'))
-                today = datetime.datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-                item["planned_time"] = today
-            except Exception:
-                item["planned_time"] = None
-        else:
-            item["planned_time"] = None
-        if "approximate_planned_time" in item and item["approximate_planned_time"]:
-            pass
-        else:
-            item["approximate_planned_time"] = None
-        day_id = item.get("day_id")
-        if day_id:
-            day = db.query(Day).filter(Day.id == day_id).first()
-            if not day:
-                try:
-                    day_date = datetime.datetime.fromisoformat(day_id)
-                except Exception:
-                    day_date = None
-                new_day = Day(id=day_id, date=day_date)
-                db.add(new_day)
-                db.commit()
-        if item.get("type") == "daily_basic":
-            item["xp_value"] = 0
-        if "parent_id" not in item:
-            item["parent_id"] = None
-        new_item = Item(**item)
-        db.add(new_item)
+        row.setdefault("id", str(uuid4()))
+        row.setdefault("completed", False)
+        # Same keys on every row so the insert runs as one executemany
+        indexed.append((index, {name: row.get(name) for name in ITEM_FIELDS}))
+
+    seen = {}
+    for index, row in indexed:
+        if row["id"] in seen:
+            errors.append({"index": index, "error": f"Duplicate id in request: {row['id']}"})
+        seen[row["id"]] = index
+    if not errors:
+        for chunk in chunks(list(seen), IN_CLAUSE_CHUNK):
+            for (item_id,) in db.query(Item.id).filter(Item.id.in_(chunk)):
+                errors.append({"index": seen[item_id], "error": f"Item already exists: {item_id}"})
+    if errors:
+        raise HTTPException(status_code=422, detail={"errors": sorted(errors, key=lambda e: e["index"])})
+
+    rows = [row for _, row in indexed]
+    try:
+        for index, row in indexed:
+            if row["type"] == "bonus" and not claim_bonus(db, row["day_id"], row["description"], row["id"]):
+                errors.append({"index": index, "error": "Bonus already awarded for this day"})
+        if errors:
+            db.rollback()
+            raise HTTPException(status_code=422, detail={"errors": errors})
+        ensure_days(db, [row["day_id"] for row in rows])
+        if rows:
+            db.execute(insert(Item), rows)
+        apply_stats(db, collect_stats(rows))
         db.commit()
-        db.refresh(new_item)
-        created_items.append(new_item)
-    return created_items
+    except Exception:
+        db.rollback()
+        raise
+    # Answer with the stored rows (column defaults included), in request order
+    stored = {}
+    for chunk in chunks([row["id"] for row in rows], IN_CLAUSE_CHUNK):
+        stored.update((row["id"], row) for row in rows_as_dicts(db.query(*ITEM_COLUMNS).filter(Item.id.in_(chunk))))
+    return [stored[row["id"]] for row in rows]
+
+def bulk_condition(body):
+    """WHERE clause for the bulk endpoints: explicit ids and/or children of one parent.
+
+    children_of = {"parent_id": ..., "column_location": "plan", "day_id": "2024-06-01"},
+    column_location and day_id are optional.
+    """
+    ids = body.get("ids") or []
+    children_of = body.get("children_of") or {}
+    if not isinstance(ids, list) or len(ids) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"ids must be a list of at most {MAX_BULK_ITEMS} ids")
+    conditions = []
+    if ids:
+        conditions.append(Item.id.in_(ids))
+    if children_of.get("parent_id"):
+        query = filter_items(
+            select(Item.id),
+            day_from=children_of.get("day_id"),
+            day_to=children_of.get("day_id"),
+            column_location=children_of.get("column_location"),
+            parent_id=children_of["parent_id"],
+        )
+        conditions.append(query.whereclause)
+    if not conditions:
+        raise HTTPException(status_code=400, detail="Provide ids and/or children_of.parent_id")
+    return or_(*conditions)
+
+
+def stats_rows(db, condition):
+    """Rows matched by condition, with only the columns the daily_stats rollup needs."""
+    return [
+        dict(row._mapping)
+        for row in db.query(Item.id, Item.day_id, Item.project_id, Item.type,
+                            Item.completed_time, Item.xp_value, Item.actual_duration).filter(condition)
+    ]
+
+
+def discard_buffered(db, condition, fields=None):
+    """Drop buffered PATCH values that a bulk write to the items matching condition supersedes."""
+    if pending_writes()[1] is not None:
+        discard_pending(db.execute(select(Item.id).where(condition)).scalars().all(), fields)
+
+@router.post("/bulk/delete")
+def delete_items_bulk(body: dict = Body(...), db: Session = Depends(get_db)):
+    condition = bulk_condition(body)
+    discard_buffered(db, condition)
+    stats = collect_stats(stats_rows(db, condition), sign=-1)
+    updated_projects = release_items_xp(db, condition)
+    release_bonuses(db, select(Item.id).where(condition, Item.type == "bonus"))
+    deleted = db.query(Item).filter(condition).delete(synchronize_session=False)
+    apply_stats(db, stats)
+    db.commit()
+    return {"deleted": deleted, "updated_projects": updated_projects}
+
+@router.patch("/bulk")
+def update_items_bulk(body: dict = Body(...), db: Session = Depends(get_db)):
+    """Set the same values on every selected item with one UPDATE.
+
+    Only fields that do not feed the XP formula or project XP can be changed
+    here; use PUT /items/{id} for those so XP is recomputed.
+    """
+    values = dict(body.get("values") or {})
+    unsupported = [key for key in values if key not in BULK_UPDATE_FIELDS]
+    if not values or unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"values must only contain: {', '.join(sorted(BULK_UPDATE_FIELDS))}",
+        )
+    if values.get("column_location"):
+        try:
+            values["column_location"] = ColumnLocationEnum(values["column_location"])
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid column_location: {values['column_location']}")
+    if "day_id" in values:
+        values["date"] = day_date(values["day_id"])
+    condition = bulk_condition(body)
+    discard_buffered(db, condition, values)
+
+    ensure_days(db, [values.get("day_id")])
+    rows = stats_rows(db, condition)
+    stats = collect_stats(rows, sign=-1)
+    collect_stats([{**row, **values} for row in rows], totals=stats)
+    updated = db.query(Item).filter(condition).update(values, synchronize_session=False)
+    apply_stats(db, stats)
+    db.commit()
+    return {"updated": updated}
 
 @router.delete("/{item_id}")
 def delete_item(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        return {"error": "Item not found"}, 404
+    discard_pending([item_id])
+    # Archived items are deleted in place
+    for model in (Item, ItemArchive):
+        item = db.query(model).filter(model.id == item_id).first()
+        if item:
+            break
+    else:
+        raise HTTPException(status_code=404, detail="Item not found")
+    apply_stats(db, collect_stats([item], sign=-1))
+    updated_projects = release_items_xp(db, model.id == item_id, model=model)
+    if item.type == "bonus":
+        release_bonuses(db, [item_id])
     db.delete(item)
     db.commit()
-    return {"ok": True}
+    return {"ok": True, "updated_projects": updated_projects}
+
+@router.patch("/{item_id}")
+def patch_item(item_id: str, values: dict = Body(...), db: Session = Depends(get_db)):
+    """Cheap update of high-frequency fields (timer, drag and drop) of an open item.
+
+    Values are merged last-write-wins into an in-memory buffer that is written
+    with one bulk UPDATE every WRITE_BUFFER_MS; completion and other fields go
+    through PUT, which picks up anything still pending.
+    """
+    unsupported = [key for key in values if key not in BUFFERED_FIELDS]
+    if not values or unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"PATCH only accepts: {', '.join(sorted(BUFFERED_FIELDS))}; use PUT for other fields",
+        )
+    values = dict(values)
+    if "column_location" in values:
+        try:
+            values["column_location"] = ColumnLocationEnum(values["column_location"])
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid column_location: {values['column_location']}")
+    if "planned_time" in values:
+        values["planned_time"] = parse_planned_time(values["planned_time"])
+    row = db.query(Item.completed, Item.completed_time).filter(Item.id == item_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if row.completed or row.completed_time:
+        # daily_stats and XP follow completed_time, so these fields must go through PUT
+        raise HTTPException(status_code=409, detail="Item is completed; use PUT so XP is recomputed")
+    if FLUSH_INTERVAL_MS <= 0:
+        db.query(Item).filter(Item.id == item_id).update(values, synchronize_session=False)
+        db.commit()
+    else:
+        buffer_write(item_id, values)
+    return {"id": item_id, **values}
 
 @router.put("/{item_id}")
 def update_item(item_id: str, item: dict = Body(...), db: Session = Depends(get_db)):
+    # Buffered PATCH values land in this write, under the fields sent now
+    pending = take_pending(item_id)
     db_item = db.query(Item).filter(Item.id == item_id).first()
+    # Editing archived history moves it back to items; a later archive run picks it up again
+    if not db_item and unarchive(db, item_id):
+        db_item = db.query(Item).filter(Item.id == item_id).first()
     if not db_item:
-        return {"error": "Item not found"}, 404
+        raise HTTPException(status_code=404, detail="Item not found")
+    # Take the old rollup contribution out before any field changes
+    stats = collect_stats([db_item], sign=-1)
+    for key, value in pending.items():
+        setattr(db_item, key, value)
     
     # Parse created_time if present and is a string
     if "created_time" in item and item["created_time"]:
@@ -216,18 +521,7 @@ def update_item(item_id: str, item: dict = Body(...), db: Session = Depends(get_
     
     # Handle planned_time - convert time string to datetime if provided
     if "planned_time" in item:
-        if item["planned_time"]:
-            try:
-                # Parse time string like "14:30" to datetime
-                time_str = item["planned_time"]
-                hour, minute = map(int, time_str.split(':'))
-                # Use today's date as base
-                today = datetime.datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-                db_item.planned_time = today
-            except Exception:
-                db_item.planned_time = None
-        else:
-            db_item.planned_time = None
+        db_item.planned_time = parse_planned_time(item["planned_time"])
     
     # Handle approximate_planned_time - store as string
     if "approximate_planned_time" in item:
@@ -247,7 +541,7 @@ def update_item(item_id: str, item: dict = Body(...), db: Session = Depends(get_
     
     # Update other fields
     for key, value in item.items():
-        if key not in ["task_quality", "column_location", "time_quality", "completed_time", "planned_time", "approximate_planned_time"]:
+        if key not in ["task_quality", "column_location", "time_quality", "completed_time", "planned_time", "approximate_planned_time"] and key not in SERVER_MANAGED_FIELDS:
             setattr(db_item, key, value)
     
     # Always ensure db_item.created_time is a datetime object
@@ -273,29 +567,78 @@ def update_item(item_id: str, item: dict = Body(...), db: Session = Depends(get_
                 completed_time=getattr(db_item, 'completed_time', None)
             )
             db_item.xp_value = xp
-            # Update project XP and levels
-            if db_item.project_id:
-                from utils.xp import update_project_xp
-                update_project_xp(db_item.project_id, xp, db_item.actual_duration, db)
+    # Update project XP and levels by the difference with what was already credited
+    updated_projects = apply_item_xp(db_item, db)
 
+    apply_stats(db, collect_stats([db_item], totals=stats))
     db.commit()
     db.refresh(db_item)
-    return db_item
+    # Ancestors whose XP changed, so the client can patch its project list without GET /projects
+    return {**item_dict(db_item), "updated_projects": updated_projects}
 
 @router.get("/{item_id}/xp_breakdown")
 def get_item_xp_breakdown(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = db.query(Item).filter(Item.id == item_id).first() or \
+        db.query(ItemArchive).filter(ItemArchive.id == item_id).first()
     if not item:
-        return {"error": "Item not found"}, 404
+        raise HTTPException(status_code=404, detail="Item not found")
     breakdown = get_xp_breakdown(item)
     return breakdown
 
+@router.get("/{item_id}/tree")
+def get_item_tree(item_id: str, request: Request, db: Session = Depends(get_db)):
+    """The item with its nested subtasks ("children") and subtree totals at every level,
+    read with one recursive query."""
+    pending, pending_version = pending_writes()
+
+    def build():
+        rows = subtree_rows(db, item_id, ITEM_COLUMNS)
+        if not rows:
+            raise HTTPException(status_code=404, detail="Item not found")
+        return nest(overlay(rows, pending) if pending else rows, item_id)
+
+    extra_versions = {"write_buffer": pending_version} if pending else None
+    return cached_json_response(request, db, ["items"], build, extra_versions=extra_versions)
+
+@router.post("/xp_breakdown")
+def get_items_xp_breakdown(body: dict = Body(...), db: Session = Depends(get_db)):
+    """XP breakdowns for {"ids": [...]} in one query, keyed by item id (unknown ids are left out)."""
+    ids = body.get("ids") or []
+    if not isinstance(ids, list) or len(ids) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"ids must be a list of at most {MAX_BULK_ITEMS} ids")
+    items = []
+    for chunk in chunks(ids, IN_CLAUSE_CHUNK):
+        for model in (Item, ItemArchive):
+            items.extend(
+                db.query(model.id, model.actual_duration, model.estimated_duration, model.task_quality,
+                         model.time_quality, model.priority).filter(model.id.in_(chunk))
+            )
+    return dict(zip((item.id for item in items), get_xp_breakdowns(items)))
+
+@router.post("/daily_basics/materialize")
+def materialize_daily_basics(body: dict = Body(default={}), db: Session = Depends(get_db)):
+    """Bring the daily_basic items from body["from"] to body["to"] in line with
+    Settings.routine_tasks, inserting and deleting only what differs.
+
+    Defaults to today through Sunday of the current week.
+    """
+    today = datetime.date.today()
+    start = parse_day(body["from"], "from") if body.get("from") else today
+    end = parse_day(body["to"], "to") if body.get("to") else today + datetime.timedelta(days=6 - today.weekday())
+    if end < start:
+        raise HTTPException(status_code=400, detail="to must not be before from")
+    if (end - start).days >= MAX_MATERIALIZE_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MATERIALIZE_DAYS} days per request")
+    day_ids = [date.isoformat() for date in day_range(start, end)]
+    result = materialize_routines(db, day_ids, routine_tasks(db, body.get("user_id") or ROUTINE_USER))
+    db.commit()
+    return result
+
 @router.delete("/bulk/daily_basics/future")
 def delete_future_daily_basics(db: Session = Depends(get_db)):
-    today = datetime.date.today().isoformat()
     deleted = db.query(Item).filter(
         Item.type == 'daily_basic',
-        Item.day_id >= today
+        Item.date >= datetime.date.today()
     ).delete(synchronize_session=False)
     db.commit()
     return {"deleted": deleted}
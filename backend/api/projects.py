@@ -1,19 +1,38 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, HTTPException, Request
 from sqlalchemy.orm import Session
-from models import Project
+from typing import Optional
+from sqlalchemy import func, select
+from models import Project, ProjectClosure, Item, ItemArchive
 from db import get_db
+from utils.projects import descendant_ids, add_project_paths, move_project, delete_project_paths, check_parent
+from utils.stats import rebuild_daily_stats
+from utils.xp import release_items_xp, credit_items_xp
+from utils.etag import cached_json_response
+from utils.archive import with_archive
+from schemas import ProjectOut, schema_columns, rows_as_dicts
 import datetime
 
 router = APIRouter(prefix="/projects")
 
-@router.get("")
-def get_projects(db: Session = Depends(get_db)):
-    return db.query(Project).filter(Project.completed == False).all()
+PROJECT_COLUMNS = schema_columns(ProjectOut, Project)
 
-@router.post("")
+@router.get("", response_model=list[ProjectOut])
+def get_projects(request: Request, db: Session = Depends(get_db)):
+    return cached_json_response(
+        request, db, ["projects"],
+        lambda: rows_as_dicts(db.query(*PROJECT_COLUMNS).filter(Project.completed == False)),
+    )
+
+@router.post("", response_model=ProjectOut)
 def create_project(project: dict, db: Session = Depends(get_db)):
+    try:
+        check_parent(db, project.get("parent_id"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     new_project = Project(**project)
     db.add(new_project)
+    db.flush()
+    add_project_paths(db, new_project.id, new_project.parent_id)
     db.commit()
     db.refresh(new_project)
     return new_project
@@ -24,6 +43,18 @@ def update_project(project_id: str, project: dict = Body(...), db: Session = Dep
     if not db_project:
         return {"error": "Project not found"}, 404
     
+    if "parent_id" in project and project["parent_id"] != db_project.parent_id:
+        # The subtree's XP leaves the old ancestors and is credited to the new ones
+        subtree = descendant_ids(project_id)
+        for model in (Item, ItemArchive):
+            release_items_xp(db, model.credited_project_id.in_(subtree), model=model)
+        try:
+            move_project(db, project_id, project["parent_id"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        for model in (Item, ItemArchive):
+            credit_items_xp(db, model.project_id.in_(subtree), model=model)
+
     # Update project fields
     for key, value in project.items():
         setattr(db_project, key, value)
@@ -32,23 +63,101 @@ def update_project(project_id: str, project: dict = Body(...), db: Session = Dep
     db.refresh(db_project)
     return db_project
 
+def closure_projects(db, condition, order_by):
+    """Projects joined to their project_closure rows, with the depth of the link."""
+    return rows_as_dicts(
+        db.query(*PROJECT_COLUMNS, ProjectClosure.depth)
+        .join(ProjectClosure, condition)
+        .order_by(*order_by)
+    )
+
+@router.get("/{project_id}/subtree")
+def get_project_subtree(project_id: str, request: Request, db: Session = Depends(get_db)):
+    """The project and all sub-projects (depth 0 is the project itself), plus the
+    XP, minutes and completed items of the whole subtree from one aggregate."""
+    def build():
+        projects = closure_projects(
+            db,
+            (ProjectClosure.descendant_id == Project.id) & (ProjectClosure.ancestor_id == project_id),
+            (ProjectClosure.depth, Project.id),
+        )
+        if not projects:
+            raise HTTPException(status_code=404, detail="Project not found")
+        subtree = select(ProjectClosure.descendant_id).where(ProjectClosure.ancestor_id == project_id)
+        completed = with_archive(
+            db, [Item.id, Item.xp_credited, Item.actual_duration],
+            lambda stmt, model: stmt.where(model.project_id.in_(subtree), model.completed == True),
+        )
+        totals = db.execute(select(
+            func.coalesce(func.sum(completed.c.xp_credited), 0),
+            func.coalesce(func.sum(completed.c.actual_duration), 0),
+            func.count(completed.c.id),
+        )).one()
+        return {
+            "projects": projects,
+            "totals": {"xp": totals[0], "actual_minutes": totals[1], "completed_count": totals[2]},
+        }
+    return cached_json_response(request, db, ["projects", "items"], build)
+
+@router.get("/{project_id}/ancestors")
+def get_project_ancestors(project_id: str, request: Request, db: Session = Depends(get_db)):
+    """The chain above the project, root first (depth = levels above the project)."""
+    def build():
+        if not db.query(Project.id).filter(Project.id == project_id).first():
+            raise HTTPException(status_code=404, detail="Project not found")
+        return closure_projects(
+            db,
+            (ProjectClosure.ancestor_id == Project.id) & (ProjectClosure.descendant_id == project_id)
+            & (ProjectClosure.depth > 0),
+            (ProjectClosure.depth.desc(),),
+        )
+    return cached_json_response(request, db, ["projects"], build)
+
 @router.delete("/{project_id}")
-def delete_project(project_id: str, db: Session = Depends(get_db)):
-    def delete_project_and_descendants(project_id):
-        # Get all children of the current project
-        children = db.query(Project).filter(Project.parent_id == project_id).all()
-        # Recursively delete all children and their descendants
-        for child in children:
-            delete_project_and_descendants(child.id)
-        # Delete the current project
-        project = db.query(Project).filter(Project.id == project_id).first()
-        if project:
-            db.delete(project)
+def delete_project(
+    project_id: str,
+    items: str = "reassign",
+    reassign_to: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Delete a project with its whole subtree in one transaction.
+
+    items=cascade deletes the subtree's items, items=reassign (default) moves
+    them to reassign_to (or to no project when it is omitted).
+    """
+    if items not in ("cascade", "reassign"):
+        raise HTTPException(status_code=400, detail="items must be 'cascade' or 'reassign'")
+    ids = [row_id for (row_id,) in db.execute(descendant_ids(project_id))]
+    if not ids:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if reassign_to and (reassign_to in ids or not db.query(Project.id).filter(Project.id == reassign_to).first()):
+        raise HTTPException(status_code=400, detail="reassign_to must be an existing project outside the deleted subtree")
     try:
-        # Start the recursive deletion
-        delete_project_and_descendants(project_id)
+        items_deleted = items_reassigned = 0
+        day_ids = set()
+        # Archived items of the subtree follow the same rule as the live ones
+        for model in (Item, ItemArchive):
+            subtree_items = db.query(model).filter(model.project_id.in_(ids))
+            day_ids.update(day_id for (day_id,) in subtree_items.with_entities(model.day_id).distinct())
+            # XP the subtree's items gave to ancestors outside it goes away (or moves with them)
+            release_items_xp(db, model.credited_project_id.in_(ids), model=model)
+            if items == "cascade":
+                items_deleted += subtree_items.delete(synchronize_session=False)
+            else:
+                moved = [item_id for (item_id,) in subtree_items.with_entities(model.id)]
+                items_reassigned += subtree_items.update({model.project_id: reassign_to}, synchronize_session=False)
+                if reassign_to and moved:
+                    credit_items_xp(db, model.id.in_(moved), model=model)
+        projects_deleted = db.query(Project).filter(Project.id.in_(ids)).delete(synchronize_session=False)
+        delete_project_paths(db, ids)
+        rebuild_daily_stats(db, day_ids)
         db.commit()
-        return {"message": "Project and all descendants deleted successfully"}
-    except Exception as e:
+    except Exception:
         db.rollback()
-        raise e
+        raise
+    return {
+        "message": "Project and all descendants deleted successfully",
+        "projects_deleted": projects_deleted,
+        "items_deleted": items_deleted,
+        "items_reassigned": items_reassigned,
+    }
@@ -1,27 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from sqlalchemy.orm import Session
 from db import get_db
 from models.settings import Settings
+from utils.etag import cached_json_response
+from schemas import SettingsOut
+from utils.routines import rematerialize_future, ROUTINE_USER
 
 router = APIRouter(prefix="/settings")
 
-@router.get("/{user_id}")
-def get_settings(user_id: str, db: Session = Depends(get_db)):
-    settings = db.query(Settings).filter_by(user_id=user_id).first()
-    if not settings:
-        # Create default settings if they don't exist
-        settings = Settings(user_id=user_id)
-        db.add(settings)
-        db.commit()
-        db.refresh(settings)
-    return {
-        "user_id": settings.user_id,
-        "time_blocks": settings.time_blocks,
-        "routine_tasks": settings.routine_tasks,
-        "last_synced": settings.last_synced
-    }
+@router.get("/{user_id}", response_model=SettingsOut)
+def get_settings(user_id: str, request: Request, db: Session = Depends(get_db)):
+    def build():
+        settings = db.query(Settings).filter_by(user_id=user_id).first()
+        if not settings:
+            # Create default settings if they don't exist
+            settings = Settings(user_id=user_id)
+            db.add(settings)
+            db.commit()
+            db.refresh(settings)
+        return {
+            "user_id": settings.user_id,
+            "time_blocks": settings.time_blocks,
+            "routine_tasks": settings.routine_tasks,
+            "last_synced": settings.last_synced
+        }
+    return cached_json_response(request, db, ["settings"], build)
 
-@router.post("/{user_id}")
+@router.post("/{user_id}", response_model=SettingsOut)
 def update_settings(user_id: str, data: dict, db: Session = Depends(get_db)):
     settings = db.query(Settings).filter_by(user_id=user_id).first()
     if not settings:
@@ -32,6 +37,9 @@ def update_settings(user_id: str, data: dict, db: Session = Depends(get_db)):
         settings.time_blocks = data["time_blocks"]
     if "routine_tasks" in data:
         settings.routine_tasks = data["routine_tasks"]
+        if user_id == ROUTINE_USER:
+            # Future days that already got their routines follow the edit
+            rematerialize_future(db, data["routine_tasks"] or [])
     if "last_synced" in data:
         settings.last_synced = data["last_synced"]
     db.commit()
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Optional
+from models import DailyStats
+from db import get_db
+from utils.dates import parse_day, day_range
+from utils.stats import rebuild_daily_stats
+from utils.projects import descendant_ids
+
+router = APIRouter(prefix="/stats")
+
+@router.get("/daily")
+def get_daily_stats(
+    day_from: str = Query(..., alias="from"),
+    day_to: str = Query(..., alias="to"),
+    project_id: Optional[str] = None,
+    include_subprojects: bool = False,
+    db: Session = Depends(get_db),
+):
+    start = parse_day(day_from, "from")
+    end = parse_day(day_to, "to")
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' is before 'from'")
+    query = db.query(
+        DailyStats.day_id,
+        func.sum(DailyStats.xp).label("xp"),
+        func.sum(DailyStats.actual_minutes).label("actual"),
+        func.sum(DailyStats.completed_count).label("completed_count"),
+    ).filter(DailyStats.day_id >= start.isoformat(), DailyStats.day_id <= end.isoformat())
+    if project_id and include_subprojects:
+        query = query.filter(DailyStats.project_id.in_(descendant_ids(project_id)))
+    elif project_id:
+        query = query.filter(DailyStats.project_id == project_id)
+    totals = {row.day_id: row for row in query.group_by(DailyStats.day_id)}
+    result = []
+    for day in day_range(start, end):
+        row = totals.get(day.isoformat())
+        result.append({
+            "day": day.isoformat(),
+            "xp": row.xp if row else 0,
+            "actual": row.actual if row else 0,
+            "completed_count": row.completed_count if row else 0,
+        })
+    return result
+
+@router.post("/rebuild")
+def rebuild_stats(db: Session = Depends(get_db)):
+    rows = rebuild_daily_stats(db)
+    db.commit()
+    return {"status": "ok", "rows": rows}
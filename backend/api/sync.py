@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from models import Item, ItemArchive, Project, Day, Tombstone
+from db import get_db
+from utils.changes import current_revision
+
+router = APIRouter(prefix="/sync")
+
+SYNC_MODELS = {"items": Item, "projects": Project, "days": Day}
+# Archived rows are still part of the data set; they keep the revision they had when moved
+SYNC_ARCHIVES = {"items": ItemArchive}
+
+@router.get("")
+def sync(since: int = 0, db: Session = Depends(get_db)):
+    """Rows of items/projects/days changed after revision `since`, plus the ids deleted since.
+
+    Clients store the returned `revision` and pass it as `since` next time;
+    since=0 returns everything.
+    """
+    revision = current_revision(db)
+    result = {"revision": revision, "deleted": {name: [] for name in SYNC_MODELS}}
+    for name, model in SYNC_MODELS.items():
+        result[name] = []
+        for source in filter(None, (model, SYNC_ARCHIVES.get(name))):
+            query = db.query(source)
+            if since:
+                query = query.filter(source.revision > since, source.revision <= revision)
+            result[name].extend(query.all())
+    if since:
+        tombstones = db.query(Tombstone.table_name, Tombstone.row_id).filter(
+            Tombstone.revision > since, Tombstone.revision <= revision
+        ).order_by(Tombstone.revision)
+        for table_name, row_id in tombstones:
+            result["deleted"][table_name].append(row_id)
+    return result
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from db import get_db
 from models.base import Base
 from models import Day, Item, Project, TaskQualityEnum, ColumnLocationEnum, TimeQualityEnum
 from db import engine
+from utils.metrics import render_metrics
 
 
 router = APIRouter(prefix="/utils")
@@ -12,6 +14,11 @@ router = APIRouter(prefix="/utils")
 def health():
     return {"status": "ok"}
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Request and SQL metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @router.post("/cleanup")
 def cleanup_database(db: Session = Depends(get_db)):
     # Drop all tables
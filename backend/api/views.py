@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Optional
+from models import Project, Day, Settings
+from db import get_db
+from utils.changes import current_revision
+from utils.dates import parse_day
+from utils.etag import cached_json_response
+from utils.archive import with_archive
+from utils.routines import materialize_lazily, ROUTINE_USER
+from utils.write_buffer import pending_writes, overlay
+from schemas import PlanViewOut, SettingsOut, rows_as_dicts
+from api.items import ITEM_COLUMNS, filter_items
+from api.projects import PROJECT_COLUMNS
+from api.days import DAY_COLUMNS
+import datetime
+
+router = APIRouter(prefix="/views")
+
+PLAN_VIEW_TABLES = ["items", "projects", "days", "settings"]
+
+
+def week_bounds(date):
+    monday = date - datetime.timedelta(days=date.weekday())
+    return monday, monday + datetime.timedelta(days=6)
+
+
+@router.get("/plan", response_model=PlanViewOut)
+def get_plan_view(
+    request: Request,
+    day: Optional[str] = None,
+    week: Optional[str] = None,
+    user_id: str = ROUTINE_USER,
+    db: Session = Depends(get_db),
+):
+    """The plan page's startup data in one response: the items and days of the
+    week containing `week` (default: the week of `day`, default today), the
+    active projects and the user's settings.
+
+    All of it is read from one snapshot; the ETag covers every table involved.
+    """
+    selected = parse_day(day) if day else datetime.date.today()
+    week_from, week_to = week_bounds(parse_day(week, "week") if week else selected)
+    next_week = week_to + datetime.timedelta(days=1)
+    materialize_lazily(db, week_from.isoformat(), week_to.isoformat())
+    pending, pending_version = pending_writes()
+
+    def build():
+        source = with_archive(
+            db, ITEM_COLUMNS,
+            lambda stmt, model: filter_items(stmt, week_from.isoformat(), week_to.isoformat(), model=model),
+            week_from.isoformat(),
+        )
+        items = rows_as_dicts(db.execute(select(source)))
+        settings = db.query(Settings).filter_by(user_id=user_id).first()
+        return {
+            "day": selected,
+            "week_from": week_from,
+            "week_to": week_to,
+            "revision": current_revision(db),
+            "items": overlay(items, pending) if pending else items,
+            "projects": rows_as_dicts(db.query(*PROJECT_COLUMNS).filter(Project.completed == False)),
+            "days": rows_as_dicts(db.query(*DAY_COLUMNS).filter(
+                Day.id >= week_from.isoformat(), Day.id < next_week.isoformat()).order_by(Day.id)),
+            # Read only: a missing row is reported with the defaults GET /settings would create
+            "settings": SettingsOut.model_validate(settings).model_dump() if settings
+            else {"user_id": user_id, "time_blocks": [], "routine_tasks": [], "last_synced": None},
+        }
+
+    if db.get_bind().dialect.name == "postgresql":
+        # One REPEATABLE READ transaction: every query sees the same snapshot
+        db.commit()
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    extra_versions = {"write_buffer": pending_version} if pending else None
+    return cached_json_response(request, db, PLAN_VIEW_TABLES, build, extra_versions=extra_versions,
+                                snapshot=True)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from db import get_db
+from utils.xp import recompute_all_xp
+from utils.stats import rebuild_daily_stats
+
+router = APIRouter(prefix="/xp")
+
+@router.post("/recompute")
+def recompute_xp(chunk_size: int = 1000, db: Session = Depends(get_db)):
+    """Re-run the XP formula over all items and rebuild project XP/levels and daily_stats."""
+    result = recompute_all_xp(db, chunk_size=max(chunk_size, 1))
+    rebuild_daily_stats(db)
+    db.commit()
+    return result
@@ -0,0 +1,58 @@
+"""Compare two result files from benchmarks.run, scenario by scenario.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+
+Exits with status 1 when a scenario's p95 grew by more than --threshold.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+
+
+def ratio(old, new):
+    if not old or new is None:
+        return None
+    return new / old
+
+
+def compare(old, new, threshold):
+    """Rows of (scenario, metric, old, new, ratio) and the scenarios whose p95 regressed."""
+    rows = []
+    regressions = []
+    for name, after in new["scenarios"].items():
+        before = old["scenarios"].get(name)
+        if not before:
+            continue
+        for metric in METRICS:
+            rows.append((name, metric, before.get(metric), after.get(metric), ratio(before.get(metric), after.get(metric))))
+        change = ratio(before.get("p95_ms"), after.get("p95_ms"))
+        if change and change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.2, help="allowed p95 ratio new/old (default 1.2)")
+    args = parser.parse_args(argv)
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    if old["meta"]["dataset"]["items"] != new["meta"]["dataset"]["items"] or old["meta"]["dialect"] != new["meta"]["dialect"]:
+        print("warning: the runs used different datasets or databases", file=sys.stderr)
+    rows, regressions = compare(old, new, args.threshold)
+    for name, metric, before, after, change in rows:
+        marker = f"{change:6.2f}x" if change is not None else "      -"
+        print(f"{name:22} {metric:20} {before!s:>10} -> {after!s:>10}  {marker}")
+    if regressions:
+        print(f"p95 regressed by more than {args.threshold}x: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Synthetic data shaped like a real planner database.
+
+Per day: about a dozen plan items, a share of them copied to fact (as
+children of the plan item, the way the Plan page does it) and completed,
+a few unplanned fact items and the routine daily_basic items. Projects
+form a tree a few levels deep. Everything is seeded, so the same
+arguments always produce the same rows.
+"""
+import datetime
+import random
+from sqlalchemy import insert
+from models import Item, Day, Project, TaskQualityEnum, TimeQualityEnum
+from utils.sql import chunks
+from utils.projects import rebuild_project_closure
+from utils.stats import rebuild_daily_stats
+from utils.xp import calculate_xp, recompute_all_xp
+
+# 12 plan items, ~60% of them copied to fact, 2 unplanned fact items, 3 routines
+PLANNED_PER_DAY = 12
+UNPLANNED_PER_DAY = 2
+ITEMS_PER_DAY = 24
+ITEMS_PER_PROJECT = 200
+PROJECT_DEPTH = 4
+DAILY_BASICS = 3
+INSERT_CHUNK = 5000
+
+
+def project_rows(count, rng):
+    """A forest: the first projects are roots, later ones hang under earlier ones."""
+    rows = []
+    for index in range(count):
+        parent = None
+        if index >= max(1, count // 10):
+            parent = rows[rng.randrange(index)]
+            if parent["depth"] >= PROJECT_DEPTH - 1:
+                parent = None
+        rows.append({
+            "id": f"bench-project-{index}",
+            "name": f"Project {index}",
+            "parent_id": parent["id"] if parent else None,
+            "depth": parent["depth"] + 1 if parent else 0,
+        })
+    return [{key: value for key, value in row.items() if key != "depth"} for row in rows]
+
+
+def item_rows(day_id, day_index, project_ids, rng, today):
+    """Items of one day; days before today are mostly completed."""
+    rows = []
+    past = day_id < today
+    for number in range(PLANNED_PER_DAY):
+        estimated = rng.choice((15, 30, 45, 60, 90, 120))
+        plan = {
+            "id": f"bench-{day_index}-{number}",
+            "description": f"Task {number}",
+            "task_quality": rng.choice(list(TaskQualityEnum)),
+            "time_quality": rng.choice(list(TimeQualityEnum)),
+            "estimated_duration": estimated,
+            "priority": rng.randint(1, 5),
+            "project_id": rng.choice(project_ids) if rng.random() < 0.8 else None,
+            "day_id": day_id,
+            "date": datetime.date.fromisoformat(day_id),
+            "column_location": "plan",
+            "type": None,
+            "completed": False,
+            "actual_duration": None,
+            "completed_time": None,
+            "parent_id": None,
+            "xp_value": None,
+        }
+        rows.append(plan)
+        if past and rng.random() < 0.6:
+            actual = max(5, int(estimated * rng.uniform(0.6, 1.6)))
+            rows.append({
+                **plan,
+                "id": f"{plan['id']}-fact",
+                "column_location": "fact",
+                "parent_id": plan["id"],
+                "completed": True,
+                "actual_duration": actual,
+                "completed_time": datetime.datetime.fromisoformat(day_id) + datetime.timedelta(hours=9 + number % 10),
+                "xp_value": calculate_xp(actual, estimated, plan["task_quality"].value,
+                                         plan["time_quality"].value, plan["priority"]),
+            })
+    for number in range(UNPLANNED_PER_DAY if past else 0):
+        actual = rng.choice((10, 20, 40))
+        rows.append({
+            "id": f"bench-{day_index}-unplanned-{number}",
+            "description": f"Unplanned {number}",
+            "task_quality": TaskQualityEnum.C,
+            "time_quality": TimeQualityEnum.not_pure,
+            "estimated_duration": actual,
+            "priority": 3,
+            "project_id": rng.choice(project_ids) if rng.random() < 0.5 else None,
+            "day_id": day_id,
+            "date": datetime.date.fromisoformat(day_id),
+            "column_location": "fact",
+            "type": None,
+            "completed": True,
+            "actual_duration": actual,
+            "completed_time": datetime.datetime.fromisoformat(day_id) + datetime.timedelta(hours=20),
+            "parent_id": None,
+            "xp_value": calculate_xp(actual, actual, "C", "not-pure", 3),
+        })
+    for number in range(DAILY_BASICS):
+        rows.append({
+            "id": f"bench-{day_index}-basic-{number}",
+            "description": f"Routine {number}",
+            "task_quality": TaskQualityEnum.D,
+            "time_quality": None,
+            "estimated_duration": 30,
+            "priority": 1,
+            "project_id": None,
+            "day_id": day_id,
+            "date": datetime.date.fromisoformat(day_id),
+            "column_location": "plan",
+            "type": "daily_basic",
+            "completed": past,
+            "actual_duration": 30 if past else None,
+            "completed_time": None,
+            "parent_id": None,
+            "xp_value": 0,
+        })
+    return rows
+
+
+def generate(db, item_count, seed=12):
+    """Insert about item_count items plus their days and projects; returns what was made."""
+    rng = random.Random(seed)
+    day_count = max(1, item_count // ITEMS_PER_DAY)
+    projects = project_rows(max(1, item_count // ITEMS_PER_PROJECT), rng)
+    project_ids = [project["id"] for project in projects]
+    # Most days are history, the last few weeks are still ahead
+    first_day = datetime.date.today() - datetime.timedelta(days=day_count - min(day_count // 5, 28))
+    today = datetime.date.today().isoformat()
+    day_ids = [(first_day + datetime.timedelta(days=offset)).isoformat() for offset in range(day_count)]
+
+    for chunk in chunks(projects, INSERT_CHUNK):
+        db.execute(insert(Project), chunk)
+    rebuild_project_closure(db)
+    for chunk in chunks(day_ids, INSERT_CHUNK):
+        db.execute(insert(Day), [{"id": day_id, "date": datetime.datetime.fromisoformat(day_id)} for day_id in chunk])
+    items = 0
+    batch = []
+    for day_index, day_id in enumerate(day_ids):
+        batch.extend(item_rows(day_id, day_index, project_ids, rng, today))
+        if len(batch) >= INSERT_CHUNK:
+            db.execute(insert(Item), batch)
+            items += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(Item), batch)
+        items += len(batch)
+    db.commit()
+    recompute_all_xp(db)
+    rebuild_daily_stats(db)
+    db.commit()
+    return {"items": items, "days": len(day_ids), "projects": len(projects),
+            "first_day": day_ids[0], "last_day": day_ids[-1]}
@@ -0,0 +1,194 @@
+"""Run the benchmark scenarios against main:app and save the results as JSON.
+
+    python -m benchmarks.run --items 10000
+    python -m benchmarks.run --items 100000 --database-url 'postgresql://localhost/ef12_bench?sslmode=disable' --reset
+
+Without --database-url a fresh SQLite file is generated next to the results.
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+class Recorder:
+    """Times requests made through call() and counts the SQL statements each one ran."""
+
+    def __init__(self, client, engine):
+        from sqlalchemy import event
+        self.client = client
+        self.state = {}
+        self.latencies = []
+        self.queries = []
+        self._lock = threading.Lock()
+        self._statements = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        with self._lock:
+            self._statements += 1
+
+    def call(self, method, url, expect=None, **kwargs):
+        with self._lock:
+            self._statements = 0
+        start = time.perf_counter()
+        response = self.client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        if (expect and response.status_code != expect) or (not expect and response.status_code >= 400):
+            raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text[:200]}")
+        with self._lock:
+            self.queries.append(self._statements)
+        self.latencies.append(elapsed)
+        return response
+
+    def reset(self):
+        self.latencies = []
+        self.queries = []
+
+
+def summarize(recorder, wall_seconds, actions, python_peak):
+    latencies = sorted(recorder.latencies)
+    milliseconds = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "actions": actions,
+        "requests": len(latencies),
+        "p50_ms": milliseconds(percentile(latencies, 0.50)),
+        "p95_ms": milliseconds(percentile(latencies, 0.95)),
+        "p99_ms": milliseconds(percentile(latencies, 0.99)),
+        "max_ms": milliseconds(latencies[-1] if latencies else None),
+        "mean_ms": milliseconds(sum(latencies) / len(latencies) if latencies else None),
+        "throughput_rps": round(len(latencies) / sum(latencies), 2) if latencies else None,
+        "actions_per_s": round(actions / wall_seconds, 2) if wall_seconds else None,
+        "queries_per_request": round(sum(recorder.queries) / len(recorder.queries), 2) if recorder.queries else None,
+        "max_queries": max(recorder.queries) if recorder.queries else None,
+        "python_peak_kb": python_peak,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def parse_args(argv):
+    from benchmarks.scenarios import SCENARIOS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000, help="approximate number of generated items")
+    parser.add_argument("--database-url", help="database to use instead of a fresh SQLite file")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate the tables of --database-url first")
+    parser.add_argument("--actions", type=int, default=100, help="actions per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed actions per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=12)
+    parser.add_argument("--trace-memory", action="store_true", help="record Python heap peaks (slows requests down)")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<time>-<dialect>-<items>.json)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios.split(",") if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    if not args.database_url:
+        path = os.path.join(RESULTS_DIR, f"bench-{args.items}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        args.database_url = f"sqlite:///{path}"
+    # db.py reads these at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("WRITE_BUFFER_MS", "500")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func
+    from db import engine, SessionLocal
+    from models import Item
+    from models.base import Base
+    from main import app
+    from benchmarks.generate import generate
+    from utils.archive import archive_completed
+    from benchmarks.scenarios import SCENARIOS
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if db.query(func.count(Item.id)).scalar():
+            sys.exit("The database already has items; pass --reset to recreate its tables")
+        started = time.perf_counter()
+        info = generate(db, args.items, seed=args.seed)
+        info["generate_s"] = round(time.perf_counter() - started, 2)
+    # Measure the steady state: history past the horizon is already archived
+    info["archived"] = archive_completed(SessionLocal)
+    print(f"Generated {info['items']} items, {info['projects']} projects, {info['days']} days "
+          f"in {info['generate_s']}s", file=sys.stderr)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "dialect": engine.dialect.name,
+            "actions": args.actions,
+            "seed": args.seed,
+            "dataset": info,
+        },
+        "scenarios": {},
+    }
+    with TestClient(app) as client:
+        recorder = Recorder(client, engine)
+        for name in args.scenarios.split(","):
+            scenario = SCENARIOS[name]
+            rng = random.Random(f"{args.seed}-{name}")
+            for _ in range(args.warmup):
+                scenario(recorder, info, rng)
+            recorder.reset()
+            if args.trace_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            for _ in range(args.actions):
+                scenario(recorder, info, rng)
+            wall = time.perf_counter() - started
+            python_peak = None
+            if args.trace_memory:
+                python_peak = tracemalloc.get_traced_memory()[1] // 1024
+                tracemalloc.stop()
+            summary = results["scenarios"][name] = summarize(recorder, wall, args.actions, python_peak)
+            print(f"{name:22} p50 {summary['p50_ms']:>9} ms  p95 {summary['p95_ms']:>9} ms  "
+                  f"p99 {summary['p99_ms']:>9} ms  {summary['queries_per_request']:>6} queries/req",
+                  file=sys.stderr)
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{engine.dialect.name}-{args.items}.json")
+    with open(out, "w") as file:
+        json.dump(results, file, indent=2)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Request patterns of the frontend, one function per user action.
+
+Each scenario gets a Recorder and the generated dataset and makes one
+action's worth of calls; only calls made through recorder.call are timed,
+anything else is setup.
+"""
+import datetime
+import uuid
+
+
+def _day(info, rng, future=False):
+    first = datetime.date.fromisoformat(info["first_day"])
+    last = datetime.date.fromisoformat(info["last_day"])
+    today = datetime.date.today()
+    start, end = (today, last) if future and last >= today else (first, last)
+    return start + datetime.timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def _week(info, rng):
+    day = _day(info, rng)
+    monday = day - datetime.timedelta(days=day.weekday())
+    return monday.isoformat(), (monday + datetime.timedelta(days=6)).isoformat()
+
+
+def _item(info, rng, **fields):
+    item = {
+        "id": f"bench-new-{uuid.uuid4()}",
+        "description": "Benchmark task",
+        "task_quality": rng.choice("ABCD"),
+        "time_quality": "pure",
+        "estimated_duration": rng.choice((15, 30, 60)),
+        "priority": rng.randint(1, 5),
+        "project_id": f"bench-project-{rng.randrange(info['projects'])}",
+        "day_id": _day(info, rng, future=True).isoformat(),
+        "column_location": "plan",
+    }
+    item.update(fields)
+    return item
+
+
+def app_start(recorder, info, rng):
+    """App.jsx on load: every item, every project, the settings."""
+    recorder.call("GET", "/items")
+    recorder.call("GET", "/projects")
+    recorder.call("GET", "/settings/default")
+
+
+def plan_week(recorder, info, rng):
+    """WeekSelector: one week of items."""
+    day_from, day_to = _week(info, rng)
+    recorder.call("GET", "/items", params={"day_from": day_from, "day_to": day_to})
+
+
+def plan_week_revalidate(recorder, info, rng):
+    """The same week again with the ETag from the last response (304 path)."""
+    day_from, day_to = _week(info, rng)
+    params = {"day_from": day_from, "day_to": day_to}
+    etag = recorder.client.get("/items", params=params).headers.get("etag")
+    recorder.call("GET", "/items", params=params, headers={"If-None-Match": etag}, expect=304)
+
+
+def stats_month(recorder, info, rng):
+    """Statistics page: 30 days of rollups."""
+    end = _day(info, rng)
+    start = end - datetime.timedelta(days=29)
+    recorder.call("GET", "/stats/daily", params={"from": start.isoformat(), "to": end.isoformat()})
+
+
+def create_item(recorder, info, rng):
+    """AddTaskPopup: one new task."""
+    recorder.call("POST", "/items", json=_item(info, rng))
+
+
+def bulk_create(recorder, info, rng):
+    """A week of routine tasks in one request, as the settings page used to send them."""
+    day_from, _ = _week(info, rng)
+    monday = datetime.date.fromisoformat(day_from)
+    rows = [
+        _item(info, rng, type="daily_basic", project_id=None, task_quality="D",
+              day_id=(monday + datetime.timedelta(days=offset)).isoformat())
+        for offset in range(7) for _ in range(7)
+    ]
+    recorder.call("POST", "/items/bulk", json=rows)
+
+
+def update_item(recorder, info, rng):
+    """EditTaskPopup / completion: PUT of a whole task."""
+    item = _item(info, rng)
+    recorder.client.post("/items", json=item)
+    recorder.call("PUT", f"/items/{item['id']}", json={
+        **item,
+        "completed": True,
+        "column_location": "fact",
+        "actual_duration": item["estimated_duration"] + rng.randint(-10, 20),
+        "completed_time": f"{item['day_id']}T12:00:00",
+    })
+
+
+def timer_tick(recorder, info, rng):
+    """Running task timer: actual_duration updates through the write buffer."""
+    item = recorder.state.get("timer_item")
+    if not item:
+        item = recorder.state["timer_item"] = _item(info, rng)
+        recorder.client.post("/items", json=item)
+    recorder.state["timer_minutes"] = recorder.state.get("timer_minutes", 0) + 1
+    recorder.call("PATCH", f"/items/{item['id']}", json={"actual_duration": recorder.state["timer_minutes"]})
+
+
+def bulk_delete(recorder, info, rng):
+    """Deleting a plan task together with its children."""
+    parent = _item(info, rng)
+    children = [_item(info, rng, parent_id=parent["id"], column_location="fact") for _ in range(5)]
+    recorder.client.post("/items/bulk", json=[parent, *children])
+    recorder.call("POST", "/items/bulk/delete",
+                  json={"ids": [parent["id"]], "children_of": {"parent_id": parent["id"]}})
+
+
+def delete_project(recorder, info, rng):
+    """Deleting a small project subtree with its items."""
+    root = f"bench-delete-{uuid.uuid4()}"
+    recorder.client.post("/projects", json={"id": root, "name": "Delete me"})
+    for index in range(3):
+        recorder.client.post("/projects", json={"id": f"{root}-{index}", "name": "Child", "parent_id": root})
+    recorder.client.post("/items/bulk", json=[
+        _item(info, rng, project_id=f"{root}-{index % 3}") for index in range(30)
+    ])
+    recorder.call("DELETE", f"/projects/{root}", params={"items": "cascade"})
+
+
+def sync(recorder, info, rng):
+    """Delta sync of a client that is a few writes behind."""
+    # A since beyond the current revision returns nothing but the revision itself
+    revision = recorder.client.get("/sync", params={"since": 2 ** 62}).json()["revision"]
+    recorder.call("GET", "/sync", params={"since": max(0, revision - 50)})
+
+
+SCENARIOS = {
+    "app_start": app_start,
+    "plan_week": plan_week,
+    "plan_week_revalidate": plan_week_revalidate,
+    "stats_month": stats_month,
+    "create_item": create_item,
+    "bulk_create": bulk_create,
+    "update_item": update_item,
+    "timer_tick": timer_tick,
+    "bulk_delete": bulk_delete,
+    "delete_project": delete_project,
+    "sync": sync,
+}
@@ -1,9 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 import os
 
 from models import Day, Item, Project, TaskQualityEnum, ColumnLocationEnum, TimeQualityEnum
 from models.base import Base  # <-- ИСПОЛЬЗУЙ ОБЩИЙ Base
+from utils.changes import track_changes
+from utils.metrics import instrument_engine
+from utils.dates import day_date
 
 SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL") or "sqlite:///./app.db"
 
@@ -12,20 +16,108 @@ connect_args = {}
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
     connect_args["check_same_thread"] = False
 elif SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
-    connect_args["sslmode"] = "require"
+    # TLS is required unless the URL (?sslmode=disable for a local server) or DB_SSLMODE says otherwise
+    if "sslmode" not in make_url(SQLALCHEMY_DATABASE_URL).query:
+        connect_args["sslmode"] = os.environ.get("DB_SSLMODE", "require")
+
+# Route handlers are plain `def`, so FastAPI runs them in a pool of this many
+# worker threads (set in main.py; anyio's default is 40). By default the
+# connection pool can grow to the same size, so no handler waits for a connection.
+WORKER_THREADS = int(os.environ.get("WORKER_THREADS", 40))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args=connect_args,
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
+    pool_size=DB_POOL_SIZE,
+    max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", max(WORKER_THREADS - DB_POOL_SIZE, 0))),
+    pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+    pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", -1)),
 )
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+track_changes(SessionLocal)
+
+
+def _backfill_dates(table_name):
+    def backfill(conn):
+        # One UPDATE per distinct day id; ids that are not dates keep a NULL date
+        day_ids = conn.execute(text(f"SELECT DISTINCT day_id FROM {table_name} WHERE day_id IS NOT NULL")).scalars()
+        rows = [{"day_id": day_id, "date": day_date(day_id)} for day_id in day_ids if day_date(day_id)]
+        if rows:
+            conn.execute(text(f"UPDATE {table_name} SET date = :date WHERE day_id = :day_id"), rows)
+    return backfill
+
+
+# SQL (or a function of the connection) run once, right after the named column was added to an existing table
+BACKFILLS = {
+    # Completed items were already credited with their full XP
+    ("items", "xp_credited"): (
+        "UPDATE items SET xp_credited = COALESCE(xp_value, 0), credited_project_id = project_id "
+        "WHERE completed AND project_id IS NOT NULL"
+    ),
+    ("items", "date"): _backfill_dates("items"),
+    ("items_archive", "date"): _backfill_dates("items_archive"),
+}
+# Indexes superseded by newer ones, dropped where they still exist
+DROPPED_INDEXES = [
+    "ix_items_day_column_type", "ix_items_project_day", "ix_items_type_day",
+    "ix_items_archive_day_column_type", "ix_items_archive_project_day", "ix_items_archive_type_day",
+]
+
+
+def upgrade_schema(existing_tables):
+    """Bring a database created by an older version up to date.
+
+    create_all() skips existing tables together with their new columns and
+    indexes, and new derived tables start empty, so all of that is handled here.
+    """
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    added.append((table.name, column.name))
+        for key in added:
+            backfill = BACKFILLS.get(key)
+            if callable(backfill):
+                backfill(conn)
+            elif backfill:
+                conn.execute(text(backfill))
+        for name in DROPPED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    if "daily_stats" not in existing_tables and "items" in existing_tables:
+        from utils.stats import rebuild_daily_stats
+        with SessionLocal() as db:
+            rebuild_daily_stats(db)
+            db.commit()
+    if "day_bonuses" not in existing_tables and "items" in existing_tables:
+        from utils.days import backfill_day_bonuses
+        with SessionLocal() as db:
+            backfill_day_bonuses(db)
+            db.commit()
+    if "project_closure" not in existing_tables and "projects" in existing_tables:
+        from utils.projects import rebuild_project_closure
+        with SessionLocal() as db:
+            rebuild_project_closure(db)
+            db.commit()
+
 
+existing_tables = set(inspect(engine).get_table_names())
 # Теперь это точно создаст все таблицы
 Base.metadata.create_all(bind=engine)
+upgrade_schema(existing_tables)
 
 def get_db():
     db = SessionLocal()
@@ -1,12 +1,51 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from api.projects import router as projects_router
 from api.items import router as items_router
 from api.days import router as days_router
 from api.utils import router as utils_router
 from api.settings import router as settings_router
+from api.stats import router as stats_router
+from api.xp import router as xp_router
+from api.sync import router as sync_router
+from api.events import router as events_router
+from api.views import router as views_router
+from db import SessionLocal, WORKER_THREADS
+from utils.write_buffer import flush_periodically, FLUSH_INTERVAL_MS
+from utils.archive import archive_periodically, ARCHIVE_AFTER_DAYS
+from utils.metrics import TimedJSONResponse, start_request, finish_request
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app):
+    to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    flusher = asyncio.create_task(flush_periodically(SessionLocal)) if FLUSH_INTERVAL_MS > 0 else None
+    archiver = asyncio.create_task(archive_periodically(SessionLocal)) if ARCHIVE_AFTER_DAYS > 0 else None
+    yield
+    for task in (flusher, archiver):
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Per-route latency, SQL statement count and DB/serialization time for /utils/metrics."""
+    token, metrics = start_request(request.url.path)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        finish_request(token, metrics, request.method, route.path if route else "unmatched", status)
 
 # Allow requests from your frontend (localhost:5173)
 app.add_middleware(
@@ -18,6 +57,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 @app.get("/")
@@ -29,3 +69,8 @@ app.include_router(items_router)
 app.include_router(days_router)
 app.include_router(utils_router)
 app.include_router(settings_router)
+app.include_router(stats_router)
+app.include_router(xp_router)
+app.include_router(sync_router)
+app.include_router(events_router)
+app.include_router(views_router)
@@ -1,4 +1,10 @@
 from .day import Day
 from .item import Item, TaskQualityEnum, ColumnLocationEnum, TimeQualityEnum
 from .project import Project 
-from .settings import Settings
\ No newline at end of file
+from .settings import Settings
+from .daily_stats import DailyStats
+from .table_version import TableVersion
+from .tombstone import Tombstone
+from .project_closure import ProjectClosure
+from .day_bonus import DayBonus
+from .item_archive import ItemArchive
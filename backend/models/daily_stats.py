@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer
+from models.base import Base
+
+class DailyStats(Base):
+    """Per day and project rollup of completed items (daily_basic excluded).
+
+    Kept up to date by the item write paths in api/items.py; rebuild with
+    utils.stats.rebuild_daily_stats().
+    """
+    __tablename__ = "daily_stats"
+    day_id = Column(String, primary_key=True)
+    project_id = Column(String, primary_key=True, default="")  # "" for items without a project
+    xp = Column(Integer, default=0, nullable=False)
+    actual_minutes = Column(Integer, default=0, nullable=False)
+    completed_count = Column(Integer, default=0, nullable=False)
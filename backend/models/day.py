@@ -1,8 +1,14 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, BigInteger, Boolean, DateTime
 import datetime
 from models.base import Base
 
 class Day(Base):
     __tablename__ = "days"
     id = Column(String, primary_key=True, index=True)
-    date = Column(DateTime, default=datetime.datetime.utcnow) 
\ No newline at end of file
+    date = Column(DateTime, default=datetime.datetime.utcnow)
+    # Set once utils/routines.py has generated this day's daily_basic items
+    routines_materialized = Column(Boolean, nullable=True, default=False)
+    # Stamped on every write by utils/changes.py, read by GET /sync
+    updated_at = Column(DateTime, nullable=True)
+    revision = Column(BigInteger, nullable=True, index=True)
+ 
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+import datetime
+from models.base import Base
+
+class DayBonus(Base):
+    """A bonus awarded for a day; the primary key keeps each bonus to once per day
+    no matter how many clients claim it."""
+    __tablename__ = "day_bonuses"
+    day_id = Column(String, primary_key=True)
+    bonus_id = Column(String, primary_key=True)
+    item_id = Column(String, nullable=True)  # the type="bonus" item carrying the XP
+    awarded_at = Column(DateTime, default=datetime.datetime.utcnow)
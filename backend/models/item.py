@@ -1,7 +1,9 @@
 import enum
 import uuid
-from sqlalchemy import Column, String, Integer, Boolean, Enum, ForeignKey, DateTime
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, Enum, ForeignKey, Date, DateTime, Index
+from sqlalchemy.orm import validates
 from models.base import Base
+from utils.dates import day_date
 import datetime
 
 class TaskQualityEnum(enum.Enum):
@@ -21,6 +23,14 @@ class TimeQualityEnum(enum.Enum):
 class Item(Base):
     __tablename__ = "items"
     __mapper_args__ = {'confirm_deleted_rows': False}
+    __table_args__ = (
+        # Week/day views filter by date first, then column and type
+        Index("ix_items_date_column_type", "date", "column_location", "type"),
+        Index("ix_items_project_date", "project_id", "date"),
+        Index("ix_items_parent_column", "parent_id", "column_location"),
+        # GET /items/breaks and other per-type reads
+        Index("ix_items_type_date", "type", "date"),
+    )
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     description = Column(String)
     full_description = Column(String, nullable=True)
@@ -34,12 +44,22 @@ class Item(Base):
     time_quality = Column(Enum(TimeQualityEnum), nullable=True)
     project_id = Column(String, ForeignKey("projects.id"))
     day_id = Column(String, ForeignKey("days.id"))
+    # Typed copy of day_id for range queries; Core writes set it with utils.dates.day_date()
+    date = Column(Date, nullable=True)
     parent_id = Column(String, ForeignKey("items.id", ondelete="SET NULL"), nullable=True)
     completed_time = Column(DateTime, nullable=True)
     created_time = Column(DateTime, default=datetime.datetime.utcnow, nullable=False) 
     planned_time = Column(DateTime, nullable=True, default=None)
     approximate_planned_time = Column(String, nullable=True, default=None)
     type = Column(String, nullable=True)
-    
-    
-  
\ No newline at end of file
+    # XP currently credited to the project tree by this item, and to which project
+    xp_credited = Column(Integer, nullable=True, default=0)
+    credited_project_id = Column(String, nullable=True)
+    # Stamped on every write by utils/changes.py, read by GET /sync
+    updated_at = Column(DateTime, nullable=True)
+    revision = Column(BigInteger, nullable=True, index=True)
+
+    @validates("day_id")
+    def _set_date(self, key, day_id):
+        self.date = day_date(day_id)
+        return day_id
@@ -0,0 +1,24 @@
+from sqlalchemy import Table, Column, DateTime, Index
+from models.base import Base
+from models.item import Item
+
+
+def _archive_columns():
+    # Same columns as items, without foreign keys: archived rows outlive their days/parents
+    return [Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+            for column in Item.__table__.columns]
+
+
+class ItemArchive(Base):
+    """Completed items older than the archive horizon, moved out of items by
+    utils/archive.py. Read together with items by the range reads."""
+    __table__ = Table(
+        "items_archive",
+        Base.metadata,
+        *_archive_columns(),
+        Column("archived_at", DateTime, nullable=True),
+        Index("ix_items_archive_date_column_type", "date", "column_location", "type"),
+        Index("ix_items_archive_project_date", "project_id", "date"),
+        Index("ix_items_archive_type_date", "type", "date"),
+        Index("ix_items_archive_parent", "parent_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean
+from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey, Boolean, DateTime
 from models.base import Base
 
 class Project(Base):
@@ -9,4 +9,8 @@ class Project(Base):
     current_level = Column(Integer, default=0)
     next_level_xp = Column(Integer, default=100)
     parent_id = Column(String, ForeignKey("projects.id"), nullable=True)
-    completed = Column(Boolean, default=False) 
\ No newline at end of file
+    completed = Column(Boolean, default=False)
+    # Stamped on every write by utils/changes.py, read by GET /sync
+    updated_at = Column(DateTime, nullable=True)
+    revision = Column(BigInteger, nullable=True, index=True)
+ 
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer, Index
+from models.base import Base
+
+class ProjectClosure(Base):
+    """Every (ancestor, descendant) pair of the project tree, including (p, p) at depth 0.
+
+    Kept up to date by the project write paths in api/projects.py; rebuild with
+    utils.projects.rebuild_project_closure().
+    """
+    __tablename__ = "project_closure"
+    __table_args__ = (
+        Index("ix_project_closure_descendant_depth", "descendant_id", "depth"),
+    )
+    ancestor_id = Column(String, primary_key=True)
+    descendant_id = Column(String, primary_key=True)
+    depth = Column(Integer, nullable=False)
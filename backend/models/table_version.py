@@ -0,0 +1,8 @@
+from sqlalchemy import Column, String, BigInteger
+from models.base import Base
+
+class TableVersion(Base):
+    """Change counter per table, bumped by every committed write (see utils/changes.py)."""
+    __tablename__ = "table_versions"
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
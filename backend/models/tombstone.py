@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime
+import datetime
+from models.base import Base
+
+class Tombstone(Base):
+    """A deleted items/projects/days row, kept so GET /sync can tell clients to drop it."""
+    __tablename__ = "tombstones"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String, nullable=False)
+    row_id = Column(String, nullable=False)
+    revision = Column(BigInteger, nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,15 @@
+from .item import ItemOut
+from .project import ProjectOut
+from .day import DayOut
+from .settings import SettingsOut
+from .view import PlanViewOut
+
+
+def schema_columns(schema, model):
+    """The model's columns named by the schema's fields, for queries that select plain rows."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_as_dicts(rows):
+    """Row tuples from a column query as dicts, ready for orjson (no jsonable_encoder pass)."""
+    return [row._asdict() for row in rows]
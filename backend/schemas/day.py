@@ -0,0 +1,14 @@
+import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class DayOut(BaseModel):
+    """A day as read endpoints return it: one field per days column."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    date: Optional[datetime.datetime] = None
+    routines_materialized: Optional[bool] = None
+    updated_at: Optional[datetime.datetime] = None
+    revision: Optional[int] = None
@@ -0,0 +1,34 @@
+import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from models import TaskQualityEnum, ColumnLocationEnum, TimeQualityEnum
+
+
+class ItemOut(BaseModel):
+    """An item as read endpoints return it: one field per items column."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    description: Optional[str] = None
+    full_description: Optional[str] = None
+    task_quality: Optional[TaskQualityEnum] = None
+    estimated_duration: Optional[int] = None
+    actual_duration: Optional[int] = None
+    priority: Optional[int] = None
+    completed: Optional[bool] = None
+    column_location: Optional[ColumnLocationEnum] = None
+    xp_value: Optional[int] = None
+    time_quality: Optional[TimeQualityEnum] = None
+    project_id: Optional[str] = None
+    day_id: Optional[str] = None
+    date: Optional[datetime.date] = None
+    parent_id: Optional[str] = None
+    completed_time: Optional[datetime.datetime] = None
+    created_time: Optional[datetime.datetime] = None
+    planned_time: Optional[datetime.datetime] = None
+    approximate_planned_time: Optional[str] = None
+    type: Optional[str] = None
+    xp_credited: Optional[int] = None
+    credited_project_id: Optional[str] = None
+    updated_at: Optional[datetime.datetime] = None
+    revision: Optional[int] = None
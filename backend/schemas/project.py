@@ -0,0 +1,18 @@
+import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class ProjectOut(BaseModel):
+    """A project as read endpoints return it: one field per projects column."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    name: Optional[str] = None
+    current_xp: Optional[int] = None
+    current_level: Optional[int] = None
+    next_level_xp: Optional[int] = None
+    parent_id: Optional[str] = None
+    completed: Optional[bool] = None
+    updated_at: Optional[datetime.datetime] = None
+    revision: Optional[int] = None
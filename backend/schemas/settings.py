@@ -0,0 +1,12 @@
+from typing import Any, Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class SettingsOut(BaseModel):
+    """Settings of one user as GET/POST /settings/{user_id} return them."""
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: str
+    time_blocks: Optional[list[Any]] = None
+    routine_tasks: Optional[list[Any]] = None
+    last_synced: Optional[str] = None
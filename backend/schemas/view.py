@@ -0,0 +1,19 @@
+import datetime
+from typing import Optional
+from pydantic import BaseModel
+from .item import ItemOut
+from .project import ProjectOut
+from .day import DayOut
+from .settings import SettingsOut
+
+
+class PlanViewOut(BaseModel):
+    """Everything the plan page loads at startup, read from one snapshot."""
+    day: datetime.date
+    week_from: datetime.date
+    week_to: datetime.date
+    revision: Optional[int] = None
+    items: list[ItemOut]
+    projects: list[ProjectOut]
+    days: list[DayOut]
+    settings: SettingsOut
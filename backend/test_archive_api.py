@@ -0,0 +1,160 @@
+import datetime
+import random
+import uuid
+from fastapi.testclient import TestClient
+from main import app
+from db import SessionLocal
+from utils.archive import archive_completed
+
+client = TestClient(app)
+
+
+def test_archived_items_stay_readable_and_counted():
+    year = random.randint(1000, 1999)  # far in the past, nothing else lives there
+    day_id = f"{year}-06-15"
+    project_id = str(uuid.uuid4())
+    client.post("/projects", json={"id": project_id, "name": "Archive"})
+    done = {"column_location": "fact", "completed": True, "completed_time": f"{day_id}T10:00:00",
+            "actual_duration": 25, "xp_value": 7, "project_id": project_id, "day_id": day_id}
+    parent = client.post("/items", json={"id": str(uuid.uuid4()), "description": "parent", **done}).json()
+    child = client.post("/items", json={"id": str(uuid.uuid4()), "description": "child",
+                                        "parent_id": parent["id"], **done}).json()
+    open_task = client.post("/items", json={"id": str(uuid.uuid4()), "description": "open",
+                                            "column_location": "plan", "project_id": project_id,
+                                            "day_id": day_id}).json()
+    stats_params = {"from": day_id, "to": day_id, "project_id": project_id}
+    stats = client.get("/stats/daily", params=stats_params).json()
+    assert (stats[0]["completed_count"], stats[0]["actual"]) == (2, 50)
+    since = client.get("/sync", params={"since": 2 ** 62}).json()["revision"]
+    reads = {
+        "plan": lambda: sorted(item["id"] for item in client.get("/views/plan", params={"day": day_id}).json()["items"]),
+        "summary": lambda: client.get(f"/days/{day_id}/summary").json(),
+        "tree": lambda: client.get(f"/items/{parent['id']}/tree").json(),
+        "subtree": lambda: client.get(f"/projects/{project_id}/subtree").json()["totals"],
+    }
+    before = {name: read() for name, read in reads.items()}
+
+    # Children go first, their parents in a later batch; unfinished tasks stay
+    assert archive_completed(SessionLocal, cutoff=datetime.date(year, 12, 31)) >= 2
+    params = {"project_id": project_id, "day_from": f"{year}-01-01", "day_to": day_id}
+    ids = {item["id"] for item in client.get("/items", params=params).json()}
+    assert ids == {parent["id"], child["id"], open_task["id"]}
+    assert client.get("/items", params={**params, "completed": False}).json()[0]["id"] == open_task["id"]
+    # Archiving is not a delete for sync clients
+    assert client.get("/sync", params={"since": since}).json()["deleted"]["items"] == []
+    assert {parent["id"], child["id"]} <= {item["id"] for item in client.get("/sync").json()["items"]}
+    # Every other read unions the archive too
+    assert {name: read() for name, read in reads.items()} == before
+    assert before["summary"]["actual_minutes"] == 50 and before["subtree"]["completed_count"] == 2
+
+    assert client.post("/stats/rebuild").status_code == 200
+    assert client.get("/stats/daily", params=stats_params).json() == stats
+
+    deleted = client.delete(f"/projects/{project_id}", params={"items": "cascade"}).json()
+    assert deleted["items_deleted"] == 3
+    assert client.get("/items", params=params).json() == []
+
+
+def test_reparent_moves_archived_xp():
+    year = random.randint(1000, 1999)
+    day_id = f"{year}-03-10"
+    old_root, new_root, project_id = (str(uuid.uuid4()) for _ in range(3))
+    client.post("/projects", json={"id": old_root, "name": "R1"})
+    client.post("/projects", json={"id": new_root, "name": "R2"})
+    client.post("/projects", json={"id": project_id, "name": "Moving", "parent_id": old_root})
+    item_id = str(uuid.uuid4())
+    client.post("/items", json={"id": item_id, "description": "archived", "project_id": project_id,
+                                "day_id": day_id, "column_location": "plan", "estimated_duration": 60,
+                                "priority": 1, "task_quality": "A", "time_quality": "pure"})
+    xp = client.put(f"/items/{item_id}", json={
+        "completed": True, "actual_duration": 60, "completed_time": f"{day_id}T10:00:00",
+    }).json()["xp_value"]
+    archive_completed(SessionLocal, cutoff=datetime.date(year, 12, 31))
+
+    assert client.put(f"/projects/{project_id}", json={"parent_id": new_root}).status_code == 200
+    projects = {project["id"]: project["current_xp"] for project in client.get("/projects").json()}
+    assert (projects[old_root], projects[new_root]) == (0, xp)
+
+
+def test_reopened_items_stay_and_archived_items_can_be_deleted():
+    year = random.randint(1000, 1999)
+    day_id = f"{year}-09-20"
+    project_id = str(uuid.uuid4())
+    client.post("/projects", json={"id": project_id, "name": "Deletable"})
+    ids = []
+    for description in ("done", "reopened"):
+        item_id = str(uuid.uuid4())
+        client.post("/items", json={"id": item_id, "description": description, "project_id": project_id,
+                                    "day_id": day_id, "column_location": "plan", "estimated_duration": 30,
+                                    "priority": 1, "task_quality": "A", "time_quality": "pure"})
+        client.put(f"/items/{item_id}", json={"completed": True, "actual_duration": 30,
+                                              "completed_time": f"{day_id}T10:00:00"})
+        ids.append(item_id)
+    done, reopened = ids
+    # Reopening keeps completed_time; the task must stay editable
+    client.put(f"/items/{reopened}", json={"completed": False})
+    archive_completed(SessionLocal, cutoff=datetime.date(year, 12, 31))
+    assert client.put(f"/items/{reopened}", json={"description": "still live"}).status_code == 200
+
+    since = client.get("/sync", params={"since": 2 ** 62}).json()["revision"]
+    response = client.delete(f"/items/{done}")
+    assert response.json()["ok"] is True
+    params = {"day_from": day_id, "day_to": day_id, "project_id": project_id}
+    assert [item["id"] for item in client.get("/items", params=params).json()] == [reopened]
+    assert {project["id"]: project["current_xp"] for project in client.get("/projects").json()}[project_id] == 0
+    assert client.get("/sync", params={"since": since}).json()["deleted"]["items"] == [done]
+
+
+def test_archived_items_can_be_scored_and_edited():
+    year = random.randint(1000, 1999)
+    day_id = f"{year}-11-05"
+    project_id = str(uuid.uuid4())
+    client.post("/projects", json={"id": project_id, "name": "Editable history"})
+    parent_id, item_id = str(uuid.uuid4()), str(uuid.uuid4())
+    for new_id, parent in ((parent_id, None), (item_id, parent_id)):
+        client.post("/items", json={"id": new_id, "description": "old", "project_id": project_id,
+                                    "parent_id": parent, "day_id": day_id, "column_location": "plan",
+                                    "estimated_duration": 45, "priority": 1, "task_quality": "A",
+                                    "time_quality": "pure"})
+        client.put(f"/items/{new_id}", json={"completed": True, "actual_duration": 45,
+                                             "completed_time": f"{day_id}T10:00:00"})
+    breakdown = client.get(f"/items/{item_id}/xp_breakdown").json()
+    archive_completed(SessionLocal, cutoff=datetime.date(year, 12, 31))
+
+    assert client.get(f"/items/{item_id}/xp_breakdown").json() == breakdown
+    assert client.post("/items/xp_breakdown", json={"ids": [item_id]}).json() == {item_id: breakdown}
+    assert client.get(f"/items/{uuid.uuid4()}/xp_breakdown").status_code == 404
+    assert client.put(f"/items/{uuid.uuid4()}", json={"description": "missing"}).status_code == 404
+
+    # Editing moves the item (and its archived parent) back to items
+    response = client.put(f"/items/{item_id}", json={"description": "corrected"})
+    assert response.status_code == 200, response.text
+    assert response.json()["description"] == "corrected"
+    params = {"day_from": day_id, "day_to": day_id, "project_id": project_id}
+    items = {item["id"]: item for item in client.get("/items", params=params).json()}
+    assert set(items) == {parent_id, item_id} and items[item_id]["description"] == "corrected"
+    xp = {project["id"]: project["current_xp"] for project in client.get("/projects").json()}[project_id]
+    assert xp == 2 * breakdown["total_xp"]
+
+
+def test_tree_of_a_live_item_includes_archived_subtasks():
+    year = random.randint(1000, 1999)
+    day_id = f"{year}-02-14"
+    parent = client.post("/items", json={"id": str(uuid.uuid4()), "description": "open parent",
+                                         "day_id": day_id, "column_location": "plan"}).json()
+    child = client.post("/items", json={"id": str(uuid.uuid4()), "description": "done child",
+                                        "parent_id": parent["id"], "day_id": day_id, "column_location": "fact",
+                                        "completed": True, "completed_time": f"{day_id}T09:00:00",
+                                        "actual_duration": 20}).json()
+    grandchild = client.post("/items", json={"id": str(uuid.uuid4()), "description": "done grandchild",
+                                             "parent_id": child["id"], "day_id": day_id, "column_location": "fact",
+                                             "completed": True, "completed_time": f"{day_id}T08:00:00",
+                                             "actual_duration": 10}).json()
+    before = client.get(f"/items/{parent['id']}/tree").json()
+    assert archive_completed(SessionLocal, cutoff=datetime.date(year, 12, 31)) >= 2
+
+    tree = client.get(f"/items/{parent['id']}/tree").json()
+    assert tree == before
+    assert [node["id"] for node in tree["children"]] == [child["id"]]
+    assert [node["id"] for node in tree["children"][0]["children"]] == [grandchild["id"]]
+    assert tree["totals"]["actual_duration"] == 30
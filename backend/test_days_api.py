@@ -0,0 +1,114 @@
+import datetime
+import random
+import uuid
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from main import app
+from db import SessionLocal
+from models import DayBonus
+from utils.days import backfill_day_bonuses
+
+client = TestClient(app)
+
+
+def test_create_day_is_idempotent():
+    day_id = f"{random.randint(3000, 3999)}-03-{random.randint(10, 28)}"
+    first = client.post("/days", json={"id": day_id})
+    second = client.post("/days", json={"id": day_id, "date": "2000-01-01T00:00:00"})
+    assert first.status_code == second.status_code == 200
+    # The second call leaves the existing day alone
+    assert second.json()["date"] == first.json()["date"]
+    assert client.post("/days", json={}).status_code == 400
+
+
+def test_day_range_materializes_every_day():
+    year = random.randint(3000, 3999)
+    client.post("/days", json={"id": f"{year}-01-30"})
+    response = client.post("/days/range", json={"from": f"{year}-01-30", "to": f"{year}-02-02"})
+    assert response.status_code == 200, response.text
+    day_ids = [f"{year}-01-30", f"{year}-01-31", f"{year}-02-01", f"{year}-02-02"]
+    assert response.json() == {"days": day_ids}
+    stored = {day["id"] for day in client.get("/days").json()}
+    assert set(day_ids) <= stored
+
+    assert client.post("/days/range", json={"from": f"{year}-02-02", "to": f"{year}-01-30"}).status_code == 400
+    assert client.post("/days/range", json={"from": "nope", "to": f"{year}-01-30"}).status_code == 400
+    assert client.post("/days/range", json={"from": f"{year}-01-01", "to": f"{year + 5}-01-01"}).status_code == 400
+
+
+def free_day(weekday):
+    """A day in an unused far-future year with the given weekday (0 = Monday)."""
+    date = datetime.date(random.randint(4000, 8999), 3, 1)
+    return date + datetime.timedelta(days=(weekday - date.weekday()) % 7)
+
+
+def add_item(**fields):
+    item = {"id": str(uuid.uuid4()), "description": "task", "estimated_duration": 30,
+            "column_location": "plan", **fields}
+    response = client.post("/items", json=item)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_rollover_moves_or_copies_unfinished_plan_tasks():
+    day = free_day(2)
+    day_id, next_id = day.isoformat(), (day + datetime.timedelta(days=1)).isoformat()
+    parent = add_item(day_id=day_id)
+    child = add_item(day_id=day_id, parent_id=parent["id"])
+    done = add_item(day_id=day_id, completed=True, completed_time=f"{day_id}T10:00:00", column_location="fact")
+    add_item(day_id=day_id, type="daily_basic")
+
+    copied = client.post(f"/days/{day_id}/rollover", json={"mode": "copy"})
+    assert copied.json() == {"from": day_id, "to": next_id, "mode": "copy", "count": 2}
+    assert client.post(f"/days/{day_id}/rollover", json={"mode": "copy"}).json()["count"] == 0
+    copies = {item["id"]: item for item in client.get("/items", params={"day_from": next_id, "day_to": next_id}).json()}
+    assert copies[f"{child['id']}@{next_id}"]["parent_id"] == f"{parent['id']}@{next_id}"
+
+    moved = client.post(f"/days/{day_id}/rollover").json()
+    assert moved["count"] == 2
+    left = {item["id"] for item in client.get("/items", params={"day_from": day_id, "day_to": day_id}).json()}
+    assert parent["id"] not in left and done["id"] in left
+    assert client.post(f"/days/{day_id}/rollover", json={"mode": "swap"}).status_code == 400
+
+
+def test_summary_and_planning_bonus_are_awarded_once():
+    day_id = free_day(1).isoformat()
+    add_item(day_id=day_id, estimated_duration=600)
+    summary = client.get(f"/days/{day_id}/summary").json()
+    assert (summary["planned_minutes"], summary["planned_count"]) == (600, 1)
+    assert summary["planning_bonus"] == {"id": "today_well_planned_not_sunday", "eligible": False, "awarded": False}
+    assert client.post(f"/days/{day_id}/bonuses/today_well_planned_not_sunday").status_code == 409
+
+    add_item(day_id=day_id, estimated_duration=480)
+    assert client.get(f"/days/{day_id}/summary").json()["planning_bonus"]["eligible"] is True
+    first = client.post(f"/days/{day_id}/bonuses/today_well_planned_not_sunday").json()
+    second = client.post(f"/days/{day_id}/bonuses/today_well_planned_not_sunday").json()
+    assert first["awarded"] is True and first["item"]["xp_value"] == 30
+    assert second == {"awarded": False, "item_id": first["item_id"]}
+    summary = client.get(f"/days/{day_id}/summary").json()
+    assert summary["planning_bonus"]["awarded"] is True and summary["xp"] == 30
+
+    # Bonus items posted directly are held to the same once-per-day rule
+    bonus = {"type": "bonus", "day_id": day_id, "description": "first_task_of_day", "xp_value": 5}
+    first = client.post("/items", json=bonus)
+    assert first.status_code == 200
+    assert client.post("/items", json=bonus).status_code == 409
+    assert client.post("/items/bulk", json=[{**bonus, "description": "tenth_task_of_day"}] * 2).status_code == 422
+    # Deleting the bonus item frees the claim; repeatable bonuses are never capped
+    client.delete(f"/items/{first.json()['id']}")
+    assert client.post("/items", json=bonus).status_code == 200
+    repeatable = {**bonus, "description": "type1_task", "xp_value": 20}
+    assert client.post("/items/bulk", json=[repeatable, repeatable]).status_code == 200
+    assert client.post("/items", json=repeatable).status_code == 200
+
+
+def test_backfill_claims_only_once_per_day_bonuses():
+    day_id = f"{random.randint(2100, 2999)}-05-{random.randint(10, 28)}"
+    for description in ("new_best_xp_day", "type1_task", "type1_task"):
+        client.post("/items", json={"type": "bonus", "day_id": day_id, "description": description, "xp_value": 5})
+    with SessionLocal() as db:
+        db.execute(delete(DayBonus).where(DayBonus.day_id == day_id))
+        backfill_day_bonuses(db)
+        db.commit()
+        claimed = db.execute(select(DayBonus.bonus_id).where(DayBonus.day_id == day_id)).scalars().all()
+    assert claimed == ["new_best_xp_day"]
@@ -0,0 +1,49 @@
+import asyncio
+import uuid
+import orjson
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+from main import app
+from api.events import event_stream
+
+client = TestClient(app)
+
+
+class OpenRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def parse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["event"], orjson.loads(fields["data"])
+
+
+def test_event_stream_sends_committed_changes():
+    item_id = str(uuid.uuid4())
+
+    async def read_events():
+        stream = event_stream(OpenRequest())
+        ready = parse(await anext(stream))
+        response = await run_in_threadpool(client.post, "/items", json={
+            "id": item_id, "description": "pushed", "column_location": "plan"})
+        assert response.status_code == 200
+        # Other tests' writes may interleave; wait for the one made here
+        while True:
+            event, change = parse(await asyncio.wait_for(anext(stream), 5))
+            if item_id in change.get("changed", {}).get("items", []):
+                break
+        deleted = await run_in_threadpool(client.delete, f"/items/{item_id}")
+        assert deleted.status_code == 200
+        while True:
+            _, removal = parse(await asyncio.wait_for(anext(stream), 5))
+            if item_id in removal["deleted"].get("items", []):
+                break
+        await stream.aclose()
+        return ready, event, change, removal
+
+    ready, event, change, removal = asyncio.run(read_events())
+    assert ready[0] == "ready" and isinstance(ready[1]["revision"], int)
+    assert event == "change"
+    assert change["revision"] > ready[1]["revision"] and "items" in change["tables"]
+    assert removal["revision"] > change["revision"]
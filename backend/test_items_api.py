@@ -0,0 +1,296 @@
+import random
+import threading
+import uuid
+from fastapi.testclient import TestClient
+from main import app
+from db import SessionLocal
+from utils.write_buffer import flush_writes, take_pending
+
+client = TestClient(app)
+
+
+def make_item(**fields):
+    item = {
+        "id": str(uuid.uuid4()),
+        "description": "test task",
+        "estimated_duration": 30,
+        "priority": 2,
+        "task_quality": "B",
+        "time_quality": "pure",
+        "column_location": "plan",
+    }
+    item.update(fields)
+    response = client.post("/items", json=item)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_get_items_filters_and_pagination():
+    project_id = str(uuid.uuid4())
+    client.post("/projects", json={"id": project_id, "name": "Filters"})
+    plan = [make_item(project_id=project_id, day_id=f"2031-03-0{day}") for day in (1, 2, 3)]
+    fact = make_item(project_id=project_id, day_id="2031-03-02", column_location="fact")
+
+    response = client.get("/items", params={"project_id": project_id, "day_from": "2031-03-02", "day_to": "2031-03-03"})
+    assert response.status_code == 200
+    assert {item["id"] for item in response.json()} == {plan[1]["id"], plan[2]["id"], fact["id"]}
+
+    response = client.get("/items", params={"project_id": project_id, "column_location": "fact"})
+    assert [item["id"] for item in response.json()] == [fact["id"]]
+
+    response = client.get("/items", params={"project_id": project_id, "fields": "day_id,column_location"})
+    assert all(set(item) == {"id", "day_id", "column_location"} for item in response.json())
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"project_id": project_id, "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/items", params=params)
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(item["id"] for item in plan + [fact])
+
+
+def test_get_items_rejects_bad_filters():
+    assert client.get("/items", params={"day_from": "not-a-day"}).status_code == 400
+    assert client.get("/items", params={"fields": "id,nope"}).status_code == 400
+    assert client.get("/items", params={"column_location": "elsewhere"}).status_code == 400
+
+
+def test_bulk_create_is_all_or_nothing():
+    day_id = "2031-04-01"
+    project_id = str(uuid.uuid4())
+    rows = [
+        {"id": str(uuid.uuid4()), "description": f"routine {n}", "day_id": day_id, "project_id": project_id,
+         "type": "daily_basic", "task_quality": "D", "column_location": "plan", "xp_value": 5}
+        for n in range(3)
+    ]
+    bad = rows + [{"description": "broken", "task_quality": "Z"}, {"description": "extra", "nope": 1}]
+    response = client.post("/items/bulk", json=bad)
+    assert response.status_code == 422
+    assert [error["index"] for error in response.json()["detail"]["errors"]] == [3, 4]
+    assert client.get("/items", params={"project_id": project_id}).json() == []
+    # Indexes refer to the request, also after a row that failed validation
+    response = client.post("/items/bulk", json=[bad[3], rows[0], rows[0]])
+    assert [error["index"] for error in response.json()["detail"]["errors"]] == [0, 2]
+
+    response = client.post("/items/bulk", json=rows)
+    assert response.status_code == 200, response.text
+    created = response.json()
+    assert [item["id"] for item in created] == [row["id"] for row in rows]
+    assert all(item["xp_value"] == 0 and item["completed"] is False for item in created)
+    # The response holds the stored rows, server-filled columns included
+    assert all(item["created_time"] and item["xp_credited"] == 0 and item["date"] == day_id for item in created)
+    bonus = client.post("/items/bulk", json=[{"type": "bonus", "day_id": day_id, "description": "type1_task",
+                                              "xp_value": 20, "planned_time": "14:30"}]).json()[0]
+    assert bonus["created_time"] and bonus["xp_credited"] == 0 and bonus["xp_value"] == 20
+    assert len(client.get("/items", params={"project_id": project_id}).json()) == 3
+    assert day_id in {day["id"] for day in client.get("/days").json()}
+
+    response = client.post("/items/bulk", json=rows[:1])
+    assert response.status_code == 422
+    assert "already exists" in response.json()["detail"]["errors"][0]["error"]
+
+
+def test_bulk_delete_and_update():
+    parent = make_item(day_id="2031-05-01")
+    children = [make_item(day_id=day, parent_id=parent["id"]) for day in ("2031-05-01", "2031-05-01", "2031-05-02")]
+    fact_child = make_item(day_id="2031-05-01", parent_id=parent["id"], column_location="fact")
+
+    response = client.patch("/items/bulk", json={
+        "children_of": {"parent_id": parent["id"], "column_location": "plan"},
+        "values": {"approximate_planned_time": "morning"},
+    })
+    assert response.json() == {"updated": 3}
+    assert client.patch("/items/bulk", json={"ids": [parent["id"]], "values": {"priority": 1}}).status_code == 400
+
+    response = client.post("/items/bulk/delete", json={
+        "ids": [parent["id"]],
+        "children_of": {"parent_id": parent["id"], "column_location": "plan", "day_id": "2031-05-01"},
+    })
+    assert response.json()["deleted"] == 3
+    remaining = client.get("/items", params={"parent_id": parent["id"]}).json()
+    assert {item["id"] for item in remaining} == {children[2]["id"], fact_child["id"]}
+    planned = {item["id"]: item["approximate_planned_time"] for item in remaining}
+    assert planned == {children[2]["id"]: "morning", fact_child["id"]: None}
+    assert client.post("/items/bulk/delete", json={}).status_code == 400
+
+
+def test_conditional_get_uses_change_token():
+    project_id = str(uuid.uuid4())
+    params = {"project_id": project_id}
+    first = client.get("/items", params=params)
+    etag = first.headers["ETag"]
+    assert first.json() == []
+    assert client.get("/items", params=params, headers={"If-None-Match": etag}).status_code == 304
+    # Another filter is another representation
+    assert client.get("/items", params={"project_id": project_id, "type": "x"}).headers["ETag"] != etag
+
+    make_item(project_id=project_id, day_id="2031-06-01")
+    response = client.get("/items", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 1 and response.headers["ETag"] != etag
+
+    projects = client.get("/projects")
+    assert client.get("/projects", headers={"If-None-Match": projects.headers["ETag"]}).status_code == 304
+
+
+def test_export_streams_filtered_items():
+    import csv
+    import io
+    import json
+
+    project_id = str(uuid.uuid4())
+    created = [make_item(project_id=project_id, day_id=day) for day in ("2031-07-01", "2031-07-02", "2031-07-09")]
+    params = {"project_id": project_id, "day_from": "2031-07-01", "day_to": "2031-07-07"}
+
+    response = client.get("/items/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(item["id"] for item in created[:2])
+    assert rows[0]["column_location"] == "plan" and "T" in rows[0]["created_time"]
+
+    response = client.get("/items/export", params={**params, "format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert sorted(row["id"] for row in rows) == sorted(item["id"] for item in created[:2])
+    assert client.get("/items/export", params={"format": "xml"}).status_code == 400
+
+
+def test_materialize_daily_basics_writes_only_the_difference():
+    user_id = f"routines-{uuid.uuid4()}"
+    year = random.randint(3000, 3999)
+    window = {"from": f"{year}-04-01", "to": f"{year}-04-03", "user_id": user_id}
+    routines = [
+        {"id": "r1", "name": "Stretch", "priority": 2, "duration": "15", "start": "07:00", "end": "07:15"},
+        {"id": "r2", "name": "Read", "priority": 1, "duration": "30", "start": "21:00", "end": "21:30"},
+    ]
+    client.post(f"/settings/{user_id}", json={"routine_tasks": routines})
+
+    def basics():
+        items = client.get("/items", params={"day_from": window["from"], "day_to": window["to"],
+                                             "type": "daily_basic"}).json()
+        return sorted((item["day_id"], item["description"], item["estimated_duration"]) for item in items)
+
+    assert client.post("/items/daily_basics/materialize", json=window).json() == {"inserted": 6, "deleted": 0}
+    assert len(basics()) == 6
+    assert client.post("/items/daily_basics/materialize", json=window).json() == {"inserted": 0, "deleted": 0}
+
+    routines[1]["duration"] = "45"
+    client.post(f"/settings/{user_id}", json={"routine_tasks": routines})
+    assert client.post("/items/daily_basics/materialize", json=window).json() == {"inserted": 3, "deleted": 3}
+    assert [duration for (_, name, duration) in basics() if name == "Read"] == [45, 45, 45]
+
+    bad = {**window, "to": f"{year}-03-01"}
+    assert client.post("/items/daily_basics/materialize", json=bad).status_code == 400
+
+
+def test_patch_is_buffered_and_merged_into_reads():
+    project_id = str(uuid.uuid4())
+    client.post("/projects", json={"id": project_id, "name": "Buffered"})
+    item = make_item(project_id=project_id, day_id="2031-07-01")
+    params = {"project_id": project_id}
+    before = client.get("/items", params=params)
+
+    assert client.patch(f"/items/{item['id']}", json={"actual_duration": 5}).status_code == 200
+    assert client.patch(f"/items/{item['id']}", json={"actual_duration": 9, "column_location": "fact"}).status_code == 200
+    # Pending writes are visible and change the ETag before they reach the database
+    response = client.get("/items", params=params)
+    assert response.headers["etag"] != before.headers["etag"]
+    assert (response.json()[0]["actual_duration"], response.json()[0]["column_location"]) == (9, "fact")
+    flush_writes(SessionLocal)
+    stored = client.get("/items", params={**params, "fields": "actual_duration,column_location"}).json()
+    assert stored == [{"id": item["id"], "actual_duration": 9, "column_location": "fact"}]
+
+    assert client.patch(f"/items/{item['id']}", json={"description": "x"}).status_code == 400
+    assert client.patch(f"/items/{uuid.uuid4()}", json={"priority": 1}).status_code == 404
+
+    # PUT takes what is still pending, so completion sees the latest timer value
+    client.patch(f"/items/{item['id']}", json={"actual_duration": 30})
+    completed = client.put(f"/items/{item['id']}", json={
+        "completed": True, "completed_time": "2031-07-01T10:00:00"}).json()
+    assert completed["actual_duration"] == 30
+    assert client.patch(f"/items/{item['id']}", json={"priority": 1}).status_code == 409
+    assert flush_writes(SessionLocal) == 0
+
+
+def test_buffered_values_never_land_after_newer_writes():
+    project_id = str(uuid.uuid4())
+    client.post("/projects", json={"id": project_id, "name": "Ordered"})
+    item = make_item(project_id=project_id, day_id="2031-07-02")
+    fields = {"project_id": project_id, "fields": "column_location,actual_duration"}
+
+    # A bulk update or delete drops the older buffered values it supersedes
+    client.patch(f"/items/{item['id']}", json={"column_location": "fact", "actual_duration": 4})
+    client.patch("/items/bulk", json={"ids": [item["id"]], "values": {"column_location": "plan"}})
+    flush_writes(SessionLocal)
+    assert client.get("/items", params=fields).json()[0] == {
+        "id": item["id"], "column_location": "plan", "actual_duration": 4}
+    doomed = make_item(project_id=project_id, day_id="2031-07-02")
+    client.patch(f"/items/{doomed['id']}", json={"priority": 1})
+    client.delete(f"/items/{doomed['id']}")
+    assert flush_writes(SessionLocal) == 0
+
+    # Taking pending values waits for a running flush to commit
+    started, release = threading.Event(), threading.Event()
+
+    def slow_session():
+        started.set()
+        release.wait(5)
+        return SessionLocal()
+
+    client.patch(f"/items/{item['id']}", json={"actual_duration": 8})
+    flusher = threading.Thread(target=flush_writes, args=(slow_session,))
+    flusher.start()
+    started.wait(5)
+    taken = []
+    taker = threading.Thread(target=lambda: taken.append(take_pending(item["id"])))
+    taker.start()
+    taker.join(0.2)
+    assert taker.is_alive()
+    release.set()
+    flusher.join(5)
+    taker.join(5)
+    assert taken == [{}]
+    assert client.get("/items", params=fields).json()[0]["actual_duration"] == 8
+
+    # Stopped (completed_time set) but not completed: stats depend on it, so PUT only
+    client.put(f"/items/{item['id']}", json={"completed_time": "2031-07-02T09:00:00"})
+    assert client.patch(f"/items/{item['id']}", json={"actual_duration": 1}).status_code == 409
+
+
+def test_item_tree_nests_subtasks_with_totals():
+    root = make_item(day_id="2031-08-01", estimated_duration=60)
+    child = make_item(day_id="2031-08-01", parent_id=root["id"], estimated_duration=20)
+    make_item(day_id="2031-08-01", parent_id=child["id"], estimated_duration=10, column_location="fact",
+              completed=True, actual_duration=12, completed_time="2031-08-01T09:00:00")
+
+    response = client.get(f"/items/{root['id']}/tree")
+    assert response.status_code == 200
+    tree = response.json()
+    assert tree["id"] == root["id"]
+    assert [node["id"] for node in tree["children"]] == [child["id"]]
+    grandchild = tree["children"][0]["children"][0]
+    assert grandchild["children"] == [] and grandchild["totals"]["completion_ratio"] == 1
+    totals = tree["totals"]
+    assert (totals["items"], totals["completed"], totals["estimated_duration"]) == (3, 1, 90)
+    assert totals["actual_duration"] == 12 and totals["xp"] == (grandchild["xp_value"] or 0)
+    assert totals["completion_ratio"] == round(1 / 3, 4)
+
+    assert client.get(f"/items/{uuid.uuid4()}/tree").status_code == 404
+
+
+def test_date_follows_day_id_on_every_write():
+    item = make_item(day_id="2031-10-01T00:00:00")
+    assert item["date"] == "2031-10-01"
+    client.patch("/items/bulk", json={"ids": [item["id"]], "values": {"day_id": "2031-10-02"}})
+    moved = client.get("/items", params={"day_from": "2031-10-02", "day_to": "2031-10-02", "fields": "date"}).json()
+    assert {"id": item["id"], "date": "2031-10-02"} in moved
+    # Clients cannot set it directly; PUT follows day_id
+    updated = client.put(f"/items/{item['id']}", json={"day_id": "2031-10-05", "date": "1999-01-01"}).json()
+    assert (updated["day_id"], updated["date"]) == ("2031-10-05", "2031-10-05")
+    assert make_item(day_id="not-a-day")["date"] is None
@@ -0,0 +1,31 @@
+import logging
+from fastapi.testclient import TestClient
+from main import app
+import utils.metrics
+
+client = TestClient(app)
+
+
+def metric(text, prefix):
+    return next(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(prefix))
+
+
+def test_metrics_count_statements_per_route():
+    client.get("/projects")
+    before = client.get("/utils/metrics").text
+    client.get("/projects")
+    response = client.get("/utils/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    labels = 'method="GET",route="/projects",status="200"'
+    count = f"ef12_request_duration_seconds_count{{{labels}}}"
+    assert metric(response.text, count) == metric(before, count) + 1
+    assert metric(response.text, f"ef12_db_statements_per_request_sum{{{labels}}}") >= 1
+    assert "# TYPE ef12_db_seconds_total counter" in response.text
+
+
+def test_slow_queries_are_logged_with_the_path(monkeypatch, caplog):
+    monkeypatch.setattr(utils.metrics, "SLOW_QUERY_MS", 1e-9)
+    with caplog.at_level(logging.WARNING, logger="ef12.slow_query"):
+        client.get("/days")
+    assert any("/days" in record.getMessage() and "SELECT" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,170 @@
+import uuid
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def make_tree(depth):
+    """Create a chain of projects root -> ... -> leaf and return their ids."""
+    ids = []
+    parent_id = None
+    for level in range(depth):
+        project_id = str(uuid.uuid4())
+        client.post("/projects", json={"id": project_id, "name": f"level {level}", "parent_id": parent_id})
+        ids.append(project_id)
+        parent_id = project_id
+    return ids
+
+
+def test_completing_item_propagates_xp_to_ancestors():
+    root, middle, leaf = make_tree(3)
+    item_id = str(uuid.uuid4())
+    client.post("/items", json={
+        "id": item_id, "description": "deep task", "project_id": leaf, "day_id": "2033-01-01",
+        "estimated_duration": 600, "priority": 1, "task_quality": "A", "time_quality": "pure",
+        "column_location": "plan",
+    })
+    response = client.put(f"/items/{item_id}", json={
+        "completed": True, "actual_duration": 600, "completed_time": "2033-01-01T18:00:00",
+    })
+    assert response.status_code == 200, response.text
+    data = response.json()
+    xp = data["xp_value"]
+    assert xp > 0
+    updated = {project["id"]: project for project in data["updated_projects"]}
+    assert set(updated) == {root, middle, leaf}
+    projects = {project["id"]: project for project in client.get("/projects").json()}
+    for project_id in (root, middle, leaf):
+        assert projects[project_id]["current_xp"] == xp
+        assert projects[project_id]["current_level"] == updated[project_id]["current_level"]
+        assert projects[project_id]["next_level_xp"] == updated[project_id]["next_level_xp"]
+
+
+def test_delete_project_subtree():
+    root, middle, leaf = make_tree(3)
+    other, = make_tree(1)
+    items = {}
+    for project_id in (root, middle, leaf):
+        items[project_id] = str(uuid.uuid4())
+        client.post("/items", json={"id": items[project_id], "description": "tree item",
+                                    "project_id": project_id, "day_id": "2033-02-01"})
+
+    response = client.delete(f"/projects/{middle}", params={"reassign_to": other})
+    assert response.status_code == 200, response.text
+    assert response.json()["projects_deleted"] == 2
+    assert response.json()["items_reassigned"] == 2
+    remaining = {project["id"] for project in client.get("/projects").json()}
+    assert root in remaining and middle not in remaining and leaf not in remaining
+    moved = client.get("/items", params={"project_id": other}).json()
+    assert {item["id"] for item in moved} == {items[middle], items[leaf]}
+
+    response = client.delete(f"/projects/{root}", params={"items": "cascade"})
+    assert response.json()["items_deleted"] == 1
+    assert client.get("/items", params={"project_id": root}).json() == []
+    assert client.delete(f"/projects/{root}").status_code == 404
+
+
+def project_xp(project_id):
+    return {project["id"]: project for project in client.get("/projects").json()}[project_id]["current_xp"]
+
+
+def test_xp_is_credited_once_per_item():
+    root, leaf = make_tree(2)
+    other, = make_tree(1)
+    item_id = str(uuid.uuid4())
+    client.post("/items", json={
+        "id": item_id, "description": "once", "project_id": leaf, "day_id": "2033-03-01",
+        "estimated_duration": 100, "priority": 2, "task_quality": "B", "time_quality": "pure",
+        "column_location": "plan",
+    })
+    done = client.put(f"/items/{item_id}", json={
+        "completed": True, "actual_duration": 100, "completed_time": "2033-03-01T10:00:00",
+    }).json()
+    xp = done["xp_value"]
+    assert project_xp(root) == xp
+
+    # Saving again (even echoing the bookkeeping fields) must not add the XP twice
+    client.put(f"/items/{item_id}", json={**done, "description": "edited", "xp_credited": 0})
+    assert project_xp(root) == xp and project_xp(leaf) == xp
+
+    # Moving the item moves its XP; recompute agrees with the incremental result
+    client.put(f"/items/{item_id}", json={"project_id": other})
+    assert (project_xp(root), project_xp(leaf), project_xp(other)) == (0, 0, xp)
+    response = client.post("/xp/recompute", params={"chunk_size": 7})
+    assert response.status_code == 200, response.text
+    assert (project_xp(root), project_xp(other)) == (0, xp)
+
+    client.delete(f"/items/{item_id}")
+    assert project_xp(other) == 0
+
+
+def test_subtree_ancestors_and_reparent():
+    root, middle, leaf = make_tree(3)
+    other = str(uuid.uuid4())
+    client.post("/projects", json={"id": other, "name": "other", "parent_id": root})
+    item_id = str(uuid.uuid4())
+    client.post("/items", json={
+        "id": item_id, "description": "leaf task", "project_id": leaf, "day_id": "2033-02-01",
+        "estimated_duration": 60, "priority": 1, "task_quality": "A", "time_quality": "pure",
+        "column_location": "plan",
+    })
+    xp = client.put(f"/items/{item_id}", json={
+        "completed": True, "actual_duration": 60, "completed_time": "2033-02-01T10:00:00",
+    }).json()["xp_value"]
+
+    subtree = client.get(f"/projects/{root}/subtree").json()
+    assert [(project["id"], project["depth"]) for project in subtree["projects"]][0] == (root, 0)
+    assert {project["id"] for project in subtree["projects"]} == {root, middle, leaf, other}
+    assert subtree["totals"] == {"xp": xp, "actual_minutes": 60, "completed_count": 1}
+    assert [project["id"] for project in client.get(f"/projects/{leaf}/ancestors").json()] == [root, middle]
+    assert client.get(f"/projects/{uuid.uuid4()}/subtree").status_code == 404
+
+    # Moving the middle project under `other` takes its subtree and XP along
+    assert client.put(f"/projects/{middle}", json={"parent_id": other}).status_code == 200
+    assert [project["id"] for project in client.get(f"/projects/{leaf}/ancestors").json()] == [root, other, middle]
+    projects = {project["id"]: project for project in client.get("/projects").json()}
+    assert projects[other]["current_xp"] == xp
+    assert projects[root]["current_xp"] == xp
+    assert client.put(f"/projects/{root}", json={"parent_id": leaf}).status_code == 400
+
+    stats = client.get("/stats/daily", params={"from": "2033-02-01", "to": "2033-02-01", "project_id": other,
+                                               "include_subprojects": True}).json()
+    assert stats[0]["xp"] == xp
+
+
+def test_reassign_credits_only_the_moved_items():
+    source, = make_tree(1)
+    target, = make_tree(1)
+    xp = {}
+    for project_id in (source, target):
+        item_id = str(uuid.uuid4())
+        client.post("/items", json={
+            "id": item_id, "description": "credited", "project_id": project_id, "day_id": "2033-04-01",
+            "estimated_duration": 60, "priority": 1, "task_quality": "A", "time_quality": "pure",
+            "column_location": "plan",
+        })
+        xp[project_id] = client.put(f"/items/{item_id}", json={
+            "completed": True, "actual_duration": 60, "completed_time": "2033-04-01T10:00:00",
+        }).json()["xp_value"]
+    assert project_xp(target) == xp[target] > 0
+
+    response = client.delete(f"/projects/{source}", params={"reassign_to": target})
+    assert response.status_code == 200, response.text
+    assert project_xp(target) == xp[source] + xp[target]
+    client.post("/xp/recompute")
+    assert project_xp(target) == xp[source] + xp[target]
+
+
+def test_unknown_parent_is_rejected():
+    missing = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+    response = client.post("/projects", json={"id": project_id, "name": "orphan", "parent_id": missing})
+    assert response.status_code == 400
+    assert project_id not in {project["id"] for project in client.get("/projects").json()}
+
+    root, leaf = make_tree(2)
+    assert client.put(f"/projects/{leaf}", json={"parent_id": missing}).status_code == 400
+    assert [project["id"] for project in client.get(f"/projects/{leaf}/ancestors").json()] == [root]
+    projects = {project["id"]: project for project in client.get("/projects").json()}
+    assert projects[leaf]["parent_id"] == root
@@ -0,0 +1,57 @@
+import uuid
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def daily(project_id, day_from="2032-05-01", day_to="2032-05-03"):
+    response = client.get("/stats/daily", params={"from": day_from, "to": day_to, "project_id": project_id})
+    assert response.status_code == 200, response.text
+    return {row["day"]: row for row in response.json()}
+
+
+def test_daily_stats_follow_item_writes():
+    project_id = str(uuid.uuid4())
+    client.post("/projects", json={"id": project_id, "name": "Stats"})
+    item = {
+        "id": str(uuid.uuid4()),
+        "description": "write stats",
+        "project_id": project_id,
+        "day_id": "2032-05-02",
+        "estimated_duration": 60,
+        "priority": 1,
+        "task_quality": "A",
+        "time_quality": "pure",
+        "column_location": "plan",
+    }
+    assert client.post("/items", json=item).status_code == 200
+    client.post("/items", json={**item, "id": str(uuid.uuid4()), "type": "daily_basic"})
+    assert daily(project_id)["2032-05-02"]["completed_count"] == 0
+
+    response = client.put(f"/items/{item['id']}", json={
+        "completed": True,
+        "actual_duration": 60,
+        "completed_time": "2032-05-02T10:00:00",
+        "column_location": "fact",
+    })
+    completed = response.json()
+    stats = daily(project_id)
+    assert stats["2032-05-02"] == {"day": "2032-05-02", "xp": completed["xp_value"], "actual": 60, "completed_count": 1}
+    assert stats["2032-05-01"]["xp"] == 0 and len(stats) == 3
+
+    # Editing a completed item moves its contribution instead of adding it twice
+    client.put(f"/items/{item['id']}", json={"day_id": "2032-05-03"})
+    stats = daily(project_id)
+    assert stats["2032-05-02"]["completed_count"] == 0
+    assert stats["2032-05-03"]["completed_count"] == 1
+
+    assert client.post("/stats/rebuild").status_code == 200
+    assert daily(project_id) == stats
+
+    client.delete(f"/items/{item['id']}")
+    assert daily(project_id)["2032-05-03"]["completed_count"] == 0
+
+
+def test_daily_stats_rejects_inverted_range():
+    assert client.get("/stats/daily", params={"from": "2032-05-03", "to": "2032-05-01"}).status_code == 400
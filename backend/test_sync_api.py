@@ -0,0 +1,33 @@
+import random
+import uuid
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_sync_returns_changes_and_tombstones():
+    since = client.get("/sync", params={"since": 0}).json()["revision"]
+    item_id = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+    day_id = f"{random.randint(2100, 2999)}-02-{random.randint(10, 28)}"  # a day that does not exist yet
+    client.post("/projects", json={"id": project_id, "name": "Synced"})
+    client.post("/items", json={"id": item_id, "description": "sync me", "project_id": project_id,
+                                "day_id": day_id})
+
+    delta = client.get("/sync", params={"since": since}).json()
+    assert delta["revision"] > since
+    assert [item["id"] for item in delta["items"]] == [item_id]
+    assert [project["id"] for project in delta["projects"]] == [project_id]
+    assert day_id in {day["id"] for day in delta["days"]}
+    assert delta["deleted"] == {"items": [], "projects": [], "days": []}
+
+    since = delta["revision"]
+    assert client.get("/sync", params={"since": since}).json()["items"] == []
+    client.put(f"/items/{item_id}", json={"description": "edited"})
+    client.delete(f"/projects/{project_id}", params={"items": "cascade"})
+
+    delta = client.get("/sync", params={"since": since}).json()
+    assert delta["items"] == []
+    assert delta["deleted"]["items"] == [item_id]
+    assert delta["deleted"]["projects"] == [project_id]
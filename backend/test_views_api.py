@@ -0,0 +1,35 @@
+import datetime
+import random
+import uuid
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_plan_view_returns_the_week_in_one_cached_response():
+    monday = datetime.date(random.randint(4000, 8999), 5, 1)
+    monday -= datetime.timedelta(days=monday.weekday())
+    wednesday = (monday + datetime.timedelta(days=2)).isoformat()
+    project_id = str(uuid.uuid4())
+    client.post("/projects", json={"id": project_id, "name": "Plan view"})
+    inside = client.post("/items", json={"id": str(uuid.uuid4()), "description": "in", "day_id": wednesday,
+                                         "project_id": project_id, "column_location": "plan"}).json()
+    outside_day = (monday + datetime.timedelta(days=7)).isoformat()
+    client.post("/items", json={"id": str(uuid.uuid4()), "description": "out", "day_id": outside_day})
+
+    response = client.get("/views/plan", params={"day": wednesday})
+    assert response.status_code == 200, response.text
+    view = response.json()
+    assert (view["week_from"], view["week_to"]) == (monday.isoformat(), (monday + datetime.timedelta(days=6)).isoformat())
+    assert [item["id"] for item in view["items"]] == [inside["id"]]
+    assert [day["id"] for day in view["days"]] == [wednesday]
+    assert project_id in {project["id"] for project in view["projects"]}
+    assert view["settings"]["user_id"] == "default" and view["revision"] >= inside["revision"]
+
+    # Revalidation is one 304; any write to one of the tables changes the ETag
+    etag = response.headers["etag"]
+    assert client.get("/views/plan", params={"day": wednesday}, headers={"If-None-Match": etag}).status_code == 304
+    client.put(f"/projects/{project_id}", json={"name": "Renamed"})
+    assert client.get("/views/plan", params={"day": wednesday}, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/views/plan", params={"week": "garbage"}).status_code == 400
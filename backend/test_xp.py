@@ -0,0 +1,81 @@
+import itertools
+import math
+import uuid
+from fastapi.testclient import TestClient
+from main import app
+from models import TaskQualityEnum, TimeQualityEnum
+from utils.xp import calculate_xp, calculate_xp_batch, get_xp_breakdown, get_xp_breakdowns
+
+client = TestClient(app)
+
+
+def reference_xp(actual_duration, estimated_duration, task_quality, time_quality, priority):
+    """The original scalar formula, kept verbatim as the oracle for the table-driven engine."""
+    base_xp = actual_duration / 10
+    quality_multiplier = {"A": 4, "B": 3, "C": 2, "D": 1}.get(task_quality, 1)
+    time_quality_multiplier = 1.5 if time_quality == "pure" else 1.0
+    if priority == 1:
+        priority_multiplier = 1.5
+    elif priority == 2:
+        priority_multiplier = 1.4
+    elif priority == 3:
+        priority_multiplier = 1.3
+    else:
+        priority_multiplier = 1.0
+    penalty_multiplier = 1.0
+    if estimated_duration and actual_duration:
+        ratio = actual_duration / estimated_duration
+        if ratio < 0.46534:
+            penalty_multiplier = 0.8
+        elif 0.9345 <= ratio <= 1.1453:
+            penalty_multiplier = 1.2
+        elif 0.8345 <= ratio <= 1.2345:
+            penalty_multiplier = 1.1
+    multipliers = [quality_multiplier, time_quality_multiplier, priority_multiplier, penalty_multiplier]
+    xp = base_xp * quality_multiplier * time_quality_multiplier * priority_multiplier * penalty_multiplier
+    return base_xp, multipliers, math.floor(xp)
+
+
+GRID = list(itertools.product(
+    [0, 1, 7, 25, 46, 47, 83, 93, 100, 114, 115, 123, 124, 333, 1000],  # actual (ratios hit every band edge)
+    [None, 0, 100, 45, 60, 240],                                          # estimated
+    ["A", "B", "C", "D", None, "X"],                                      # task quality
+    ["pure", "not-pure", None],                                           # time quality
+    [None, 0, 1, 2, 3, 4],                                                # priority
+))
+
+
+def test_batch_engine_matches_reference_formula():
+    columns = calculate_xp_batch(*map(list, zip(*GRID)))
+    for index, args in enumerate(GRID):
+        base_xp, multipliers, total = reference_xp(*args)
+        assert columns["base_xp"][index] == base_xp
+        assert [columns[key][index] for key in ("quality", "time_quality", "priority", "penalty")] == multipliers
+        assert columns["total_xp"][index] == total == calculate_xp(*args)
+
+
+def test_breakdowns_match_scalar_breakdown():
+    tasks = [
+        {"actual_duration": actual, "estimated_duration": estimated, "priority": priority,
+         "task_quality": TaskQualityEnum(quality), "time_quality": TimeQualityEnum(time_quality)}
+        for actual, estimated, quality, time_quality, priority
+        in itertools.product([None, 30, 95], [None, 100], "ABCD", ["pure", "not-pure"], [1, 3, None])
+    ]
+    assert get_xp_breakdowns(tasks) == [get_xp_breakdown(task) for task in tasks]
+    assert get_xp_breakdown({"actual_duration": None})["total_xp"] == 0
+
+
+def test_bulk_xp_breakdown_endpoint():
+    ids = []
+    for actual in (30, 95):
+        item_id = str(uuid.uuid4())
+        client.post("/items", json={"id": item_id, "description": "xp", "actual_duration": actual,
+                                    "estimated_duration": 100, "priority": 1, "task_quality": "A",
+                                    "time_quality": "pure"})
+        ids.append(item_id)
+    response = client.post("/items/xp_breakdown", json={"ids": ids + ["missing"]})
+    assert response.status_code == 200
+    result = response.json()
+    assert set(result) == set(ids)
+    for item_id in ids:
+        assert result[item_id] == client.get(f"/items/{item_id}/xp_breakdown").json()
@@ -0,0 +1,122 @@
+import asyncio
+import datetime
+import logging
+import os
+from anyio import to_thread
+from sqlalchemy import select, insert, delete, func, literal, union_all, exists
+from sqlalchemy.orm import aliased
+from models import Item, ItemArchive
+from utils.dates import parse_day
+
+# Completed items whose day is more than this many days ago move to items_archive; 0 turns archiving off
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 90))
+ARCHIVE_INTERVAL_S = float(os.environ.get("ARCHIVE_INTERVAL_S", 3600))
+ARCHIVE_BATCH = 1000
+
+ITEM_COLUMN_NAMES = [column.name for column in Item.__table__.columns]
+
+logger = logging.getLogger("ef12.archive")
+
+
+def archive_cutoff(today=None):
+    """Date before which completed items are archived."""
+    today = today or datetime.date.today()
+    return today - datetime.timedelta(days=ARCHIVE_AFTER_DAYS)
+
+
+def archivable(cutoff):
+    """WHERE clause of the items ready for the archive: completed, before cutoff and
+    without subtasks left in items (children go first, so no parent_id is cut)."""
+    child = aliased(Item)
+    return (
+        Item.completed.is_(True)
+        & (Item.date < cutoff)
+        & ~exists().where(child.parent_id == Item.id)
+    )
+
+
+def archive_batch(db, cutoff, batch=ARCHIVE_BATCH):
+    """Move up to batch archivable items with one INSERT ... SELECT and one DELETE.
+
+    The delete leaves no tombstones: the rows still exist for readers. Caller commits.
+    """
+    ids = db.execute(select(Item.id).where(archivable(cutoff)).order_by(Item.date).limit(batch)).scalars().all()
+    if not ids:
+        return 0
+    db.execute(insert(ItemArchive).from_select(
+        [*ITEM_COLUMN_NAMES, "archived_at"],
+        select(*(getattr(Item, name) for name in ITEM_COLUMN_NAMES), literal(datetime.datetime.utcnow()))
+        .where(Item.id.in_(ids)),
+    ))
+    db.execute(delete(Item).where(Item.id.in_(ids)).execution_options(archive=True))
+    return len(ids)
+
+
+def unarchive(db, item_id):
+    """Move an archived item back to items, with the archived parents its parent_id
+    needs. False when item_id is not archived. Caller commits."""
+    ids = []
+    while item_id and item_id not in ids:
+        row = db.execute(select(ItemArchive.parent_id).where(ItemArchive.id == item_id)).first()
+        if row is None:
+            break
+        ids.append(item_id)
+        item_id = row.parent_id
+    if not ids:
+        return False
+    db.execute(insert(Item).from_select(
+        ITEM_COLUMN_NAMES,
+        select(*(getattr(ItemArchive, name) for name in ITEM_COLUMN_NAMES)).where(ItemArchive.id.in_(ids)),
+    ))
+    db.execute(delete(ItemArchive).where(ItemArchive.id.in_(ids)).execution_options(archive=True))
+    return True
+
+
+def archive_completed(session_factory, cutoff=None):
+    """Archive everything that is due, one transaction per batch. Returns the number of items moved."""
+    if cutoff is None:
+        if not ARCHIVE_AFTER_DAYS:
+            return 0
+        cutoff = archive_cutoff()
+    moved = 0
+    while True:
+        with session_factory() as db:
+            count = archive_batch(db, cutoff)
+            db.commit()
+        moved += count
+        if not count:
+            return moved
+
+
+async def archive_periodically(session_factory):
+    """Run archive_completed every ARCHIVE_INTERVAL_S until cancelled."""
+    while True:
+        try:
+            moved = await to_thread.run_sync(archive_completed, session_factory)
+            if moved:
+                logger.info("Archived %d completed items", moved)
+        except Exception:
+            logger.exception("Archiving completed items failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_S)
+
+
+def reaches_archive(db, day_from=None):
+    """Whether a read starting at day_from (None: no lower bound) can match archived rows."""
+    newest = db.execute(select(func.max(ItemArchive.date))).scalar()
+    return newest is not None and (not day_from or parse_day(day_from, "day_from") <= newest)
+
+
+def archive_columns(columns):
+    """The items_archive columns with the names of the given Item columns."""
+    return [getattr(ItemArchive, column.key).label(column.key) for column in columns]
+
+
+def with_archive(db, columns, where, day_from=None):
+    """SELECT of columns from items, UNION ALL the same from items_archive when
+    the read reaches into it. where(stmt, model) applies the filters to either
+    table. Returns a subquery to select from."""
+    stmt = where(select(*columns), Item)
+    if reaches_archive(db, day_from):
+        stmt = union_all(stmt, where(select(*archive_columns(columns)), ItemArchive))
+    return stmt.subquery()
+
@@ -0,0 +1,199 @@
+import datetime
+import itertools
+import time
+from sqlalchemy import event, insert, select, union_all
+from models import TableVersion, Tombstone
+from utils.sql import dialect_insert
+from utils.events import has_subscribers, publish
+
+# Tables whose readers are cached by version (see utils/etag.py)
+TRACKED_TABLES = {"items", "projects", "days", "settings"}
+# Tables with updated_at/revision columns and tombstones, served by GET /sync
+SYNCED_TABLES = {"items", "projects", "days"}
+# Archive tables (utils/archive.py) and the table their rows still count as for caches and sync
+ARCHIVE_TABLES = {"items_archive": "items"}
+# table_versions row holding the global revision counter
+REVISION_KEY = "_revision"
+# Row ids listed per table in a change event; larger changes only say "truncated"
+MAX_EVENT_IDS = 1000
+
+
+def _seed():
+    # Counters start from the current time in ms, so they never go back to a value
+    # a client may still hold after the tables were dropped and recreated.
+    return int(time.time() * 1000)
+
+
+def _increment_stmt(session):
+    stmt = dialect_insert(session, TableVersion)
+    return stmt.on_conflict_do_update(
+        index_elements=[TableVersion.table_name],
+        set_={"version": TableVersion.version + 1},
+    )
+
+
+def _revision(session):
+    """The revision of the current transaction, allocated on its first synced write.
+
+    Allocating it locks the counter row until commit, so revisions become
+    visible in increasing order and GET /sync?since= never skips one.
+    """
+    if "revision" not in session.info:
+        stmt = _increment_stmt(session).values(table_name=REVISION_KEY, version=_seed())
+        session.info["revision"] = session.execute(stmt.returning(TableVersion.version)).scalar_one()
+    return session.info["revision"]
+
+
+def _stamp():
+    return datetime.datetime.utcnow()
+
+
+def change_stamp(session):
+    """revision/updated_at values for rows written in the current transaction."""
+    return {"revision": _revision(session), "updated_at": _stamp()}
+
+
+def _synced_name(table_name):
+    return ARCHIVE_TABLES.get(table_name, table_name)
+
+
+def _touch(session, *tables):
+    changed = session.info.setdefault("changed_tables", set())
+    changed.update(table for table in map(_synced_name, tables) if table in TRACKED_TABLES)
+
+
+def _tombstones(session, table, row_ids):
+    if row_ids:
+        revision = _revision(session)
+        now = _stamp()
+        session.execute(insert(Tombstone), [
+            {"table_name": table, "row_id": row_id, "revision": revision, "deleted_at": now}
+            for row_id in row_ids
+        ])
+
+
+def _collect_flush(session, flush_context=None, instances=None):
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        _touch(session, obj.__table__.name)
+    for obj in itertools.chain(session.new, session.dirty):
+        if _synced_name(obj.__table__.name) in SYNCED_TABLES and (obj in session.new or session.is_modified(obj)):
+            obj.revision = _revision(session)
+            obj.updated_at = _stamp()
+    for obj in session.deleted:
+        name = _synced_name(obj.__table__.name)
+        if name in SYNCED_TABLES:
+            session.add(Tombstone(table_name=name, row_id=obj.id,
+                                  revision=_revision(session), deleted_at=_stamp()))
+
+
+def _collect_statement(orm_execute_state):
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = state.statement.table
+    _touch(state.session, table.name)
+    if _synced_name(table.name) not in SYNCED_TABLES:
+        return
+    if state.is_delete and state.execution_options.get("archive"):
+        # Moved to items_archive (utils/archive.py): still readable, so no tombstones
+        return
+    if state.is_delete:
+        # Set-based delete: record which rows it is about to remove
+        row_ids = state.session.execute(select(table.c.id).where(state.statement.whereclause)).scalars().all()
+        _tombstones(state.session, _synced_name(table.name), row_ids)
+        return
+    if state.is_insert and state.statement.select is not None:
+        # INSERT ... SELECT: the select itself provides change_stamp() values
+        return
+    stamp = change_stamp(state.session)
+    if isinstance(state.parameters, list):
+        # executemany (bulk insert, bulk update by primary key): stamp every row
+        for params in state.parameters:
+            params.update(stamp)
+    elif isinstance(state.parameters, dict) and state.is_insert:
+        state.parameters.update(stamp)
+    else:
+        state.statement = state.statement.values(**stamp)
+
+
+def _ids(session, stmt):
+    ids = session.execute(stmt.limit(MAX_EVENT_IDS + 1)).scalars().all()
+    return (ids, False) if len(ids) <= MAX_EVENT_IDS else (ids[:MAX_EVENT_IDS], True)
+
+
+def _change_event(session, changed, revision):
+    """What the transaction changed: tables, plus the row ids written and deleted
+    in synced tables (found by the transaction's revision)."""
+    # Table names from __table__ are quoted_name; event payloads want plain str keys
+    changed = {str(name) for name in changed}
+    change = {"revision": revision, "tables": sorted(changed), "changed": {}, "deleted": {}, "truncated": []}
+    if revision is None:
+        return change
+    tables = TableVersion.metadata.tables
+    for name in sorted(changed & SYNCED_TABLES):
+        sources = [name, *(archive for archive, synced in ARCHIVE_TABLES.items() if synced == name)]
+        ids, truncated = _ids(session, union_all(*(
+            select(tables[source].c.id).where(tables[source].c.revision == revision) for source in sources
+        )))
+        deleted, deleted_truncated = _ids(session, select(Tombstone.row_id).where(
+            Tombstone.revision == revision, Tombstone.table_name == name))
+        if ids:
+            change["changed"][name] = ids
+        if deleted:
+            change["deleted"][name] = deleted
+        if truncated or deleted_truncated:
+            change["truncated"].append(name)
+    return change
+
+
+def _bump_versions(session):
+    # Flush pending objects first so their tables are collected by before_flush
+    session.flush()
+    changed = session.info.pop("changed_tables", set())
+    revision = session.info.pop("revision", None)
+    if changed and has_subscribers():
+        session.info["change_event"] = _change_event(session, changed, revision)
+    if changed:
+        seed = _seed()
+        session.execute(_increment_stmt(session), [{"table_name": name, "version": seed} for name in sorted(changed)])
+
+
+def _publish_changes(session):
+    change = session.info.pop("change_event", None)
+    if change:
+        publish(change)
+
+
+def _forget_changes(session):
+    session.info.pop("changed_tables", None)
+    session.info.pop("revision", None)
+    session.info.pop("change_event", None)
+
+
+def track_changes(session_factory):
+    """Keep change bookkeeping in the same transaction as every write made through
+    sessions of session_factory, whether ORM flushes or insert()/update()/delete()
+    statements: table_versions counters, and revision/updated_at stamps plus
+    tombstones for the synced tables. Committed changes are published to
+    /events subscribers (utils/events.py)."""
+    event.listen(session_factory, "before_flush", _collect_flush)
+    event.listen(session_factory, "do_orm_execute", _collect_statement)
+    event.listen(session_factory, "before_commit", _bump_versions)
+    event.listen(session_factory, "after_commit", _publish_changes)
+    event.listen(session_factory, "after_rollback", _forget_changes)
+
+
+def table_versions(db, tables):
+    """Current version of each table (0 if it was never written)."""
+    versions = dict.fromkeys(tables, 0)
+    versions.update(
+        db.query(TableVersion.table_name, TableVersion.version)
+        .filter(TableVersion.table_name.in_(list(tables)))
+        .all()
+    )
+    return versions
+
+
+def current_revision(db):
+    """Highest committed revision (0 before the first synced write)."""
+    return table_versions(db, [REVISION_KEY])[REVISION_KEY]
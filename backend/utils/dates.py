@@ -0,0 +1,23 @@
+import datetime
+from fastapi import HTTPException
+
+
+def parse_day(value, name="day"):
+    """Parse the date part of a day id like "2024-06-01" (time suffix ignored), 400 on garbage."""
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+
+
+def day_range(start, end):
+    """All dates from start to end inclusive."""
+    return [start + datetime.timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def day_date(day_id):
+    """The date of a day id like "2024-06-01" (time suffix ignored), or None if it is not one."""
+    try:
+        return datetime.date.fromisoformat(str(day_id)[:10]) if day_id else None
+    except ValueError:
+        return None
@@ -0,0 +1,173 @@
+import datetime
+from sqlalchemy import select, update, delete, func, case, literal, or_, and_
+from models import Day, Item, DayBonus, ColumnLocationEnum
+from utils.sql import dialect_insert, chunks
+from utils.changes import change_stamp
+from utils.dates import day_date
+from utils.archive import with_archive
+
+UPSERT_CHUNK = 500
+# "today_well_planned_not_sunday": 18h of plan, none of it planned on the Sunday before
+PLANNING_BONUS = "today_well_planned_not_sunday"
+PLANNING_BONUS_MINUTES = 1080
+PLANNING_BONUS_XP = 30
+# Bonuses that may be earned several times a day (oncePerDay: false in frontend Bonuses/List.js)
+REPEATABLE_BONUSES = {"type1_task", "type2_task"}
+
+
+def day_row(day_id, date=None):
+    """Insert values for a Day; the date defaults to the one parsed from the id."""
+    if date is None:
+        try:
+            date = datetime.datetime.fromisoformat(day_id)
+        except Exception:
+            date = None
+    return {"id": day_id, "date": date}
+
+
+def upsert_days(db, rows):
+    """INSERT ... ON CONFLICT DO NOTHING for Day rows; existing days are left untouched.
+
+    Race free (two requests creating the same day both succeed) and does not commit.
+    """
+    stmt = dialect_insert(db, Day).on_conflict_do_nothing(index_elements=["id"])
+    for chunk in chunks(rows, UPSERT_CHUNK):
+        db.execute(stmt, chunk)
+
+
+def ensure_days(db, day_ids):
+    """Make sure a Day exists for every id in day_ids, in one statement per chunk."""
+    upsert_days(db, [day_row(day_id) for day_id in sorted({day_id for day_id in day_ids if day_id})])
+
+
+def _day_items(date, model=Item):
+    # Served by ix_items_date_column_type
+    return model.date == date
+
+
+def _counts_as_task(model=Item):
+    return or_(model.type.is_(None), model.type.not_in(["daily_basic", "bonus"]))
+
+
+def unfinished_plan(date, model=Item):
+    """WHERE clause of the plan tasks of date that were not done (routine tasks excluded)."""
+    return and_(
+        _day_items(date, model),
+        model.column_location == ColumnLocationEnum.plan,
+        model.completed.isnot(True),
+        model.completed_time.is_(None),
+        _counts_as_task(model),
+    )
+
+
+SUMMARY_COLUMNS = [Item.column_location, Item.type, Item.completed, Item.completed_time, Item.created_time,
+                   Item.estimated_duration, Item.actual_duration, Item.xp_value, Item.date]
+
+
+def day_summary(db, date):
+    """Planned/actual minutes of a day (archived items included) and its planning-bonus
+    state, from one aggregate."""
+    day_id = date.isoformat()
+    items = with_archive(db, SUMMARY_COLUMNS, lambda stmt, model: stmt.where(_day_items(date, model)), day_id).c
+    sunday = datetime.datetime.combine(date - datetime.timedelta(days=(date.weekday() + 1) % 7), datetime.time())
+    is_plan = and_(items.column_location == ColumnLocationEnum.plan, _counts_as_task(items))
+    is_done = and_(items.completed_time.isnot(None), or_(items.type.is_(None), items.type != "daily_basic"))
+    planned_on_sunday = and_(is_plan, items.created_time >= sunday,
+                             items.created_time < sunday + datetime.timedelta(days=1))
+
+    def total(condition, value=literal(1)):
+        return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+    row = db.execute(select(
+        total(is_plan, func.coalesce(items.estimated_duration, 0)),
+        total(is_plan),
+        total(is_done, func.coalesce(items.actual_duration, 0)),
+        total(is_done),
+        total(is_done, func.coalesce(items.xp_value, 0)),
+        total(unfinished_plan(date, items)),
+        total(planned_on_sunday),
+    )).one()
+    planned_minutes, planned_count, actual_minutes, completed_count, xp, unfinished, sunday_planned = map(int, row)
+    awarded = dict(db.execute(select(DayBonus.bonus_id, DayBonus.item_id).where(DayBonus.day_id == day_id)).all())
+    return {
+        "day_id": day_id,
+        "planned_minutes": planned_minutes,
+        "planned_count": planned_count,
+        "actual_minutes": actual_minutes,
+        "completed_count": completed_count,
+        "xp": xp,
+        "unfinished_plan_count": unfinished,
+        "awarded_bonuses": awarded,
+        "planning_bonus": {
+            "id": PLANNING_BONUS,
+            "eligible": planned_minutes >= PLANNING_BONUS_MINUTES and date.weekday() != 6 and not sunday_planned,
+            "awarded": PLANNING_BONUS in awarded,
+        },
+    }
+
+
+def claim_bonus(db, day_id, bonus_id, item_id):
+    """Record bonus_id as awarded for the day; False if it already was (caller commits).
+
+    Repeatable bonuses are never recorded, so they can always be claimed.
+    """
+    if not day_id or not bonus_id or bonus_id in REPEATABLE_BONUSES:
+        return True
+    stmt = dialect_insert(db, DayBonus).on_conflict_do_nothing(index_elements=["day_id", "bonus_id"])
+    result = db.execute(stmt.values(day_id=day_id[:10], bonus_id=bonus_id, item_id=item_id,
+                                    awarded_at=datetime.datetime.utcnow()))
+    return result.rowcount == 1
+
+
+def release_bonuses(db, item_ids):
+    """Forget the claims made by the given (deleted) bonus items, so they can be awarded again."""
+    db.execute(delete(DayBonus).where(DayBonus.item_id.in_(item_ids)))
+
+
+def rollover_day(db, day_id, to_day_id, copy=False):
+    """Move (or copy) the unfinished plan tasks of day_id to to_day_id with one statement.
+
+    Copies get the id "<id>@<to_day_id>", so rolling the same day over twice
+    copies nothing new; subtasks of copied parents point at the parent's copy.
+    Returns the number of items moved or copied (caller commits).
+    """
+    ensure_days(db, [to_day_id])
+    unfinished = unfinished_plan(day_date(day_id))
+    if not copy:
+        result = db.execute(
+            update(Item).where(unfinished).values(day_id=to_day_id, date=day_date(to_day_id))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    suffix = literal("@" + to_day_id)
+    copied = select(Item.id).where(unfinished)
+    values = {column.name: column for column in Item.__table__.columns}
+    values.update({
+        "id": Item.id + suffix,
+        "day_id": literal(to_day_id),
+        "date": literal(day_date(to_day_id)),
+        "parent_id": case((Item.parent_id.in_(copied), Item.parent_id + suffix), else_=Item.parent_id),
+        "created_time": literal(datetime.datetime.utcnow()),
+        "xp_credited": literal(0),
+        "credited_project_id": literal(None),
+        **{name: literal(value) for name, value in change_stamp(db).items()},
+    })
+    stmt = dialect_insert(db, Item).from_select(
+        list(values), select(*values.values()).where(unfinished)
+    ).on_conflict_do_nothing(index_elements=["id"])
+    return db.execute(stmt).rowcount
+
+
+def backfill_day_bonuses(db):
+    """Fill day_bonuses from existing type="bonus" items (one claim per day and
+    once-per-day bonus; repeatable bonuses are never claimed, as in claim_bonus).
+
+    Caller commits. Returns the number of claims written.
+    """
+    day = func.substr(Item.day_id, 1, 10)
+    source = select(day, Item.description, func.min(Item.id), func.min(Item.completed_time)).where(
+        Item.type == "bonus", Item.day_id.isnot(None), Item.description.isnot(None),
+        Item.description.not_in(REPEATABLE_BONUSES),
+    ).group_by(day, Item.description)
+    stmt = dialect_insert(db, DayBonus).from_select(["day_id", "bonus_id", "item_id", "awarded_at"], source)
+    return db.execute(stmt.on_conflict_do_nothing(index_elements=["day_id", "bonus_id"])).rowcount
@@ -0,0 +1,72 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import orjson
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from utils.changes import table_versions
+from utils.metrics import record_serialization
+
+MAX_CACHED_BODIES = 256
+# Times a snapshot=True build() is redone because a write committed while it ran
+SNAPSHOT_RETRIES = 3
+
+_bodies = OrderedDict()
+_lock = threading.Lock()
+
+
+def _etag(key, versions):
+    token = ",".join(f"{table}:{versions[table]}" for table in sorted(versions))
+    return '"' + hashlib.sha1(f"{key}|{token}".encode()).hexdigest() + '"'
+
+
+def _matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def cached_json_response(request, db, tables, build, headers=None, extra_versions=None, snapshot=False):
+    """Serve a read endpoint from the table change counters.
+
+    The ETag is derived from the request URL and the versions of `tables`:
+    a matching If-None-Match gets a 304 without running build(), a repeated
+    request gets the serialized body from memory, and only a cache miss calls
+    build() and encodes its result (ideally dicts from row tuples). headers(content) may add response headers;
+    extra_versions adds state outside the tables (e.g. buffered writes) to the ETag.
+    snapshot=True is for build()s that read several tables: the versions are
+    checked again afterwards and build() reruns if a write landed in between.
+    """
+    key = str(request.url.path) + "?" + str(request.url.query)
+    versions = table_versions(db, tables)
+    etag = _etag(key, {**versions, **(extra_versions or {})})
+    response_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request, etag):
+        return Response(status_code=304, headers=response_headers)
+    with _lock:
+        cached = _bodies.get(key)
+        if cached and cached[0] == etag:
+            _bodies.move_to_end(key)
+            return Response(cached[1], media_type="application/json", headers={**response_headers, **cached[2]})
+    content = build()
+    for _ in range(SNAPSHOT_RETRIES if snapshot else 0):
+        # Counters are bumped in the writing transaction, so equal versions mean no write in between
+        current = table_versions(db, tables)
+        if current == versions:
+            break
+        versions = current
+        etag = response_headers["ETag"] = _etag(key, {**versions, **(extra_versions or {})})
+        content = build()
+    extra = headers(content) if headers else {}
+    started = time.perf_counter()
+    # orjson encodes dicts, enums and datetimes natively; anything else (ORM objects) goes through jsonable_encoder
+    body = orjson.dumps(content, default=jsonable_encoder)
+    record_serialization(time.perf_counter() - started)
+    with _lock:
+        _bodies[key] = (etag, body, extra)
+        _bodies.move_to_end(key)
+        while len(_bodies) > MAX_CACHED_BODIES:
+            _bodies.popitem(last=False)
+    return Response(body, media_type="application/json", headers={**response_headers, **extra})
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+
+# Events a slow subscriber may fall behind by before it is told to resync instead
+MAX_QUEUED_EVENTS = 256
+
+_subscribers = set()
+_lock = threading.Lock()
+
+
+class Subscriber:
+    """An event queue on the event loop of one /events connection."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(MAX_QUEUED_EVENTS)
+        self.overflowed = False
+
+    def _push(self, event):
+        # Runs on self.loop
+        if self.queue.full():
+            self.overflowed = True
+        else:
+            self.queue.put_nowait(event)
+
+
+def has_subscribers():
+    return bool(_subscribers)
+
+
+@contextmanager
+def subscription():
+    """Receive published events for the duration of the block (call from a coroutine)."""
+    subscriber = Subscriber(asyncio.get_running_loop())
+    with _lock:
+        _subscribers.add(subscriber)
+    try:
+        yield subscriber
+    finally:
+        with _lock:
+            _subscribers.discard(subscriber)
+
+
+def publish(event):
+    """Hand event to every subscriber; safe to call from worker threads."""
+    with _lock:
+        subscribers = list(_subscribers)
+    for subscriber in subscribers:
+        try:
+            subscriber.loop.call_soon_threadsafe(subscriber._push, event)
+        except RuntimeError:
+            # The subscriber's loop is closed; its connection is going away
+            pass
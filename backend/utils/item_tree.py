@@ -0,0 +1,83 @@
+from sqlalchemy import select, literal, union_all
+from models import Item, ItemArchive
+from utils.archive import reaches_archive, archive_columns
+
+# Deepest subtask level subtree_rows() follows (guards against parent_id cycles)
+MAX_DEPTH = 64
+
+
+def _recurse(tree, model):
+    return tree.union_all(
+        select(model.id, tree.c.depth + 1)
+        .join(tree, model.parent_id == tree.c.id)
+        .where(tree.c.depth < MAX_DEPTH)
+    )
+
+
+def subtree_rows(db, item_id, columns):
+    """The item and all of its subtasks as dicts with a depth key, from one query.
+
+    A recursive CTE walks items through ix_items_parent_column. Subtasks are
+    archived before their parents, so archived rows only hang below that live
+    part (or are the root); when the archive is not empty a second recursive
+    CTE follows them through ix_items_archive_parent.
+    """
+    if not reaches_archive(db):
+        live = _recurse(select(Item.id, literal(0).label("depth")).where(Item.id == item_id)
+                        .cte("item_tree", recursive=True), Item)
+        stmt = select(*columns, live.c.depth).join(live, Item.id == live.c.id)
+    else:
+        root = union_all(select(Item.id).where(Item.id == item_id),
+                         select(ItemArchive.id).where(ItemArchive.id == item_id)).subquery()
+        live = _recurse(select(root.c.id, literal(0).label("depth")).cte("item_tree", recursive=True), Item)
+        archived = _recurse(select(ItemArchive.id, (live.c.depth + 1).label("depth")).join(live, ItemArchive.parent_id == live.c.id)
+                            .where(live.c.depth < MAX_DEPTH).cte("archived_tree", recursive=True), ItemArchive)
+        stmt = union_all(
+            select(*columns, live.c.depth).join(live, Item.id == live.c.id),
+            # The root itself when it is archived
+            select(*archive_columns(columns), live.c.depth).join(live, ItemArchive.id == live.c.id),
+            select(*archive_columns(columns), archived.c.depth).join(archived, ItemArchive.id == archived.c.id),
+        )
+    rows = stmt.subquery()
+    return [row._asdict() for row in db.execute(select(rows).order_by(rows.c.depth))]
+
+
+def subtree_totals(node, children):
+    """Totals of a node and everything below it (children already carry theirs)."""
+    totals = {
+        "items": 1,
+        "completed": 1 if node.get("completed") else 0,
+        "estimated_duration": node.get("estimated_duration") or 0,
+        "actual_duration": node.get("actual_duration") or 0,
+        "xp": node.get("xp_value") or 0,
+    }
+    for child in children:
+        for key in totals:
+            totals[key] += child["totals"][key]
+    return totals
+
+
+def nest(rows, root_id):
+    """Turn depth-ordered subtree rows into {..item, "children": [...], "totals": {...}}.
+
+    Children are ordered by creation time; a row seen twice (parent_id cycle) is kept once.
+    """
+    nodes = {}
+    for row in rows:
+        nodes.setdefault(row["id"], {**row, "children": []})
+    for node in nodes.values():
+        parent = nodes.get(node["parent_id"])
+        if node["id"] != root_id and parent is not None and parent["depth"] < node["depth"]:
+            parent["children"].append(node)
+
+    def finish(node):
+        node["children"].sort(key=lambda child: (str(child.get("created_time") or ""), child["id"]))
+        for child in node["children"]:
+            finish(child)
+        node["totals"] = subtree_totals(node, node["children"])
+        node["totals"]["completion_ratio"] = round(node["totals"]["completed"] / node["totals"]["items"], 4)
+        del node["depth"]
+
+    root = nodes[root_id]
+    finish(root)
+    return root
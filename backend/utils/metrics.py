@@ -0,0 +1,150 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+# Statements slower than this are logged with the request path; 0 turns the log off
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 200))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+logger = logging.getLogger("ef12.slow_query")
+
+# Numbers of the request being handled; shared with the worker thread running the handler
+_current = contextvars.ContextVar("request_metrics", default=None)
+_lock = threading.Lock()
+_routes = {}
+_slow_queries = 0
+
+
+def _new_route():
+    return {
+        "requests": 0,
+        "seconds": 0.0,
+        "latency": [0] * len(LATENCY_BUCKETS),
+        "statements": 0,
+        "statement_counts": [0] * len(STATEMENT_BUCKETS),
+        "db_seconds": 0.0,
+        "serialize_seconds": 0.0,
+    }
+
+
+def start_request(path):
+    """Begin collecting for the current request; returns the token for finish_request()."""
+    metrics = {"statements": 0, "db_seconds": 0.0, "serialize_seconds": 0.0, "path": path,
+               "started": time.perf_counter()}
+    return _current.set(metrics), metrics
+
+
+def finish_request(token, metrics, method, route, status):
+    """Fold one finished request into the per-route totals."""
+    _current.reset(token)
+    elapsed = time.perf_counter() - metrics["started"]
+    key = (method, route, str(status))
+    with _lock:
+        totals = _routes.setdefault(key, _new_route())
+        totals["requests"] += 1
+        totals["seconds"] += elapsed
+        totals["statements"] += metrics["statements"]
+        totals["db_seconds"] += metrics["db_seconds"]
+        totals["serialize_seconds"] += metrics["serialize_seconds"]
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                totals["latency"][index] += 1
+        for index, bound in enumerate(STATEMENT_BUCKETS):
+            if metrics["statements"] <= bound:
+                totals["statement_counts"][index] += 1
+
+
+def record_serialization(seconds):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics["serialize_seconds"] += seconds
+
+
+class TimedJSONResponse(JSONResponse):
+    """Default response class: orjson encoding, timed for the metrics."""
+
+    def render(self, content):
+        started = time.perf_counter()
+        body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        record_serialization(time.perf_counter() - started)
+        return body
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global _slow_queries
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    metrics = _current.get()
+    if metrics is not None:
+        metrics["statements"] += 1
+        metrics["db_seconds"] += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        with _lock:
+            _slow_queries += 1
+        path = metrics["path"] if metrics else "-"
+        logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, path, " ".join(statement.split()))
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine):
+    """Count and time every statement executed on engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _labels(method, route, status):
+    return f'method="{method}",route="{route}",status="{status}"'
+
+
+def render_metrics():
+    """All collected numbers in the Prometheus text exposition format."""
+    with _lock:
+        routes = {key: {**value, "latency": list(value["latency"]), "statement_counts": list(value["statement_counts"])}
+                  for key, value in _routes.items()}
+        slow_queries = _slow_queries
+    lines = []
+
+    def header(name, kind, description):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def histogram(name, field, buckets, total_field, description):
+        header(name, "histogram", description)
+        for key, totals in sorted(routes.items()):
+            labels = _labels(*key)
+            for bound, count in zip(buckets, totals[field]):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {totals["requests"]}')
+            lines.append(f"{name}_sum{{{labels}}} {totals[total_field]}")
+            lines.append(f"{name}_count{{{labels}}} {totals['requests']}")
+
+    histogram("ef12_request_duration_seconds", "latency", LATENCY_BUCKETS, "seconds",
+              "Total request latency per route.")
+    histogram("ef12_db_statements_per_request", "statement_counts", STATEMENT_BUCKETS, "statements",
+              "SQL statements executed per request.")
+    for name, field, description in (
+        ("ef12_db_seconds_total", "db_seconds", "Time spent executing SQL statements."),
+        ("ef12_serialize_seconds_total", "serialize_seconds", "Time spent encoding response bodies."),
+    ):
+        header(name, "counter", description)
+        for key, totals in sorted(routes.items()):
+            lines.append(f"{name}{{{_labels(*key)}}} {totals[field]}")
+    header("ef12_slow_queries_total", "counter", f"Statements slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms).")
+    lines.append(f"ef12_slow_queries_total {slow_queries}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,104 @@
+from sqlalchemy import select, insert, delete, func, literal, true
+from models import Project, ProjectClosure
+
+# Deepest tree rebuild_project_closure() follows (guards against parent_id cycles)
+MAX_DEPTH = 64
+CLOSURE_COLUMNS = ["ancestor_id", "descendant_id", "depth"]
+
+
+def ancestor_ids(project_id):
+    """SELECT of project_id and every ancestor id (one indexed lookup in project_closure)."""
+    return select(ProjectClosure.ancestor_id).where(ProjectClosure.descendant_id == project_id)
+
+
+def descendant_ids(project_id):
+    """SELECT of project_id and every descendant id (one indexed lookup in project_closure)."""
+    return select(ProjectClosure.descendant_id).where(ProjectClosure.ancestor_id == project_id)
+
+
+def check_parent(db, parent_id):
+    """Raise ValueError when parent_id (None: a root) is not an existing project."""
+    if parent_id and not db.execute(select(Project.id).where(Project.id == parent_id)).first():
+        raise ValueError(f"Parent project not found: {parent_id}")
+
+
+def add_project_paths(db, project_id, parent_id):
+    """Closure rows of a new project without children: itself, plus its parent's
+    ancestors one level deeper (the parent must exist, see check_parent)."""
+    rows = select(literal(project_id), literal(project_id), literal(0))
+    if parent_id:
+        rows = rows.union_all(
+            select(ProjectClosure.ancestor_id, literal(project_id), ProjectClosure.depth + 1)
+            .where(ProjectClosure.descendant_id == parent_id)
+        )
+    db.execute(insert(ProjectClosure).from_select(CLOSURE_COLUMNS, rows))
+
+
+def move_project(db, project_id, parent_id):
+    """Re-hang project_id and its subtree under parent_id (None for a root).
+
+    Raises ValueError if parent_id is not a project or is inside the subtree. Caller commits.
+    """
+    check_parent(db, parent_id)
+    subtree = descendant_ids(project_id)
+    if parent_id and db.execute(subtree.where(ProjectClosure.descendant_id == parent_id)).first():
+        raise ValueError("A project cannot be moved under itself or one of its sub-projects")
+    # Cut the links from the old ancestors to every project in the subtree
+    db.execute(
+        delete(ProjectClosure)
+        .where(ProjectClosure.descendant_id.in_(subtree), ProjectClosure.ancestor_id.not_in(subtree))
+        .execution_options(synchronize_session=False)
+    )
+    if parent_id:
+        above = select(ProjectClosure.ancestor_id, ProjectClosure.depth).where(
+            ProjectClosure.descendant_id == parent_id).subquery()
+        below = select(ProjectClosure.descendant_id, ProjectClosure.depth).where(
+            ProjectClosure.ancestor_id == project_id).subquery()
+        db.execute(insert(ProjectClosure).from_select(
+            CLOSURE_COLUMNS,
+            select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+            .select_from(above).join(below, true()),
+        ))
+
+
+def delete_project_paths(db, project_ids):
+    """Drop the closure rows of deleted projects (whole subtrees)."""
+    db.execute(
+        delete(ProjectClosure)
+        .where(ProjectClosure.descendant_id.in_(project_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild_project_closure(db):
+    """Recompute project_closure from parent_id with one recursive INSERT ... SELECT.
+
+    Caller commits. Returns the number of rows written.
+    """
+    db.execute(delete(ProjectClosure))
+    paths = select(
+        Project.id.label("ancestor_id"), Project.id.label("descendant_id"), literal(0).label("depth")
+    ).cte("paths", recursive=True)
+    paths = paths.union_all(
+        select(paths.c.ancestor_id, Project.id, paths.c.depth + 1)
+        .join(Project, Project.parent_id == paths.c.descendant_id)
+        .where(paths.c.depth < MAX_DEPTH)
+    )
+    db.execute(insert(ProjectClosure).from_select(
+        CLOSURE_COLUMNS,
+        select(paths.c.ancestor_id, paths.c.descendant_id, func.min(paths.c.depth))
+        .group_by(paths.c.ancestor_id, paths.c.descendant_id),
+    ))
+    return db.query(func.count()).select_from(ProjectClosure).scalar()
+
+
+if __name__ == "__main__":
+    # python -m utils.projects  -> rebuild the closure table
+    from db import SessionLocal
+    db = SessionLocal()
+    try:
+        rows = rebuild_project_closure(db)
+        db.commit()
+        print(f"project_closure rebuilt: {rows} rows")
+    finally:
+        db.close()
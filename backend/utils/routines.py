@@ -0,0 +1,118 @@
+import datetime
+import os
+import uuid
+from sqlalchemy import insert, select, delete, update
+from models import Item, Day
+from models.settings import Settings
+from utils.dates import parse_day, day_range, day_date
+from utils.days import ensure_days
+from utils.sql import chunks
+
+# "eager": days are filled by POST /items/daily_basics/materialize,
+# "lazy": each future day is filled the first time GET /items reads it
+ROUTINE_MODE = os.environ.get("ROUTINE_MODE", "eager")
+# Whose Settings.routine_tasks drive the plan
+ROUTINE_USER = "default"
+MAX_LAZY_DAYS = 62
+IN_CLAUSE_CHUNK = 500
+ROUTINE_FIELDS = ("description", "priority", "estimated_duration", "approximate_planned_time")
+
+
+def routine_item(basic, day_id):
+    """Item row for one routine task on one day (same shape the settings page used to POST)."""
+    priority = basic.get("priority")
+    return {
+        "id": f"{basic.get('id') or 'routine'}_{day_id}_{uuid.uuid4().hex[:12]}",
+        "description": basic.get("name"),
+        "task_quality": "D",
+        "priority": int(priority) if priority not in (None, "") else None,
+        "estimated_duration": int(basic["duration"]) if basic.get("duration") else 30,
+        "day_id": day_id,
+        "date": day_date(day_id),
+        "column_location": "plan",
+        "completed": False,
+        "approximate_planned_time": f"{basic.get('start')} - {basic.get('end')}",
+        "type": "daily_basic",
+        "xp_value": 0,
+    }
+
+
+def routine_key(row):
+    return (row["date"],) + tuple(row[name] for name in ROUTINE_FIELDS)
+
+
+def routine_tasks(db, user_id=ROUTINE_USER):
+    settings = db.get(Settings, user_id)
+    return (settings.routine_tasks or []) if settings else []
+
+
+def materialize_routines(db, day_ids, basics):
+    """Make the daily_basic items of day_ids match basics, writing only the difference.
+
+    Existing items that match a routine (same day, description, priority,
+    duration and time window) are kept whatever their id; completed ones are
+    never deleted. Marks the days as materialized; the caller commits.
+    """
+    day_ids = sorted(set(day_ids))
+    wanted = {}
+    for day_id in day_ids:
+        for basic in basics:
+            row = routine_item(basic, day_id)
+            wanted.setdefault(routine_key(row), []).append(row)
+
+    stale = []
+    for chunk in chunks(day_ids, IN_CLAUSE_CHUNK):
+        existing = db.execute(
+            select(Item.id, Item.date, Item.completed, *(getattr(Item, name) for name in ROUTINE_FIELDS))
+            .where(Item.type == "daily_basic", Item.date.in_([day_date(day_id) for day_id in chunk]))
+        ).mappings()
+        for row in existing:
+            matches = wanted.get(routine_key(row))
+            if matches:
+                matches.pop()
+            elif not row["completed"]:
+                stale.append(row["id"])
+
+    rows = [row for matches in wanted.values() for row in matches]
+    for chunk in chunks(stale, IN_CLAUSE_CHUNK):
+        db.execute(delete(Item).where(Item.id.in_(chunk)))
+    ensure_days(db, day_ids)
+    if rows:
+        db.execute(insert(Item), rows)
+    for chunk in chunks(day_ids, IN_CLAUSE_CHUNK):
+        db.execute(update(Day).where(Day.id.in_(chunk)).values(routines_materialized=True))
+    return {"inserted": len(rows), "deleted": len(stale)}
+
+
+def materialize_lazily(db, day_from, day_to):
+    """In lazy mode, fill the not yet materialized days from today on within [day_from, day_to].
+
+    Does nothing (and writes nothing) once every day in the range was filled.
+    """
+    if ROUTINE_MODE != "lazy" or not day_from or not day_to:
+        return None
+    start = max(parse_day(day_from, "day_from"), datetime.date.today())
+    end = parse_day(day_to, "day_to")
+    if end < start or (end - start).days >= MAX_LAZY_DAYS:
+        return None
+    day_ids = [date.isoformat() for date in day_range(start, end)]
+    done = set(db.execute(
+        select(Day.id).where(Day.id.in_(day_ids), Day.routines_materialized.is_(True))
+    ).scalars())
+    missing = [day_id for day_id in day_ids if day_id not in done]
+    if not missing:
+        return None
+    result = materialize_routines(db, missing, routine_tasks(db))
+    db.commit()
+    return result
+
+
+def rematerialize_future(db, basics):
+    """Re-diff the future days that were already materialized against edited routines."""
+    today = datetime.date.today().isoformat()
+    day_ids = db.execute(
+        select(Day.id).where(Day.id >= today, Day.routines_materialized.is_(True))
+    ).scalars().all()
+    if not day_ids:
+        return {"inserted": 0, "deleted": 0}
+    return materialize_routines(db, day_ids, basics)
@@ -0,0 +1,14 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(db, model):
+    """insert() that supports on_conflict_do_nothing/do_update on SQLite and Postgres."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def chunks(values, size):
+    """Split a list into consecutive slices of at most size elements (for IN clauses)."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
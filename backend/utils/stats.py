@@ -0,0 +1,107 @@
+from sqlalchemy import func, or_, literal, select, union_all
+from models import Item, ItemArchive, DailyStats
+from utils.sql import dialect_insert
+from utils.dates import day_date
+
+
+def item_contribution(item):
+    """Return ((day_id, project_id), (xp, minutes, count)) for an item that counts towards
+    daily_stats, or None. Works with ORM items and plain dicts."""
+    if isinstance(item, dict):
+        get = item.get
+    else:
+        get = lambda key: getattr(item, key, None)
+    if not get("completed_time") or not get("day_id") or get("type") == "daily_basic":
+        return None
+    key = (get("day_id")[:10], get("project_id") or "")
+    return key, (get("xp_value") or 0, get("actual_duration") or 0, 1)
+
+
+def collect_stats(items, sign=1, totals=None):
+    """Sum item contributions per (day, project); sign=-1 subtracts (deleted/old versions)."""
+    totals = {} if totals is None else totals
+    for item in items:
+        contribution = item_contribution(item)
+        if contribution is None:
+            continue
+        key, values = contribution
+        current = totals.get(key, (0, 0, 0))
+        totals[key] = tuple(total + sign * value for total, value in zip(current, values))
+    return totals
+
+
+def apply_stats(db, totals):
+    """Add collected deltas to daily_stats with one upsert (caller commits)."""
+    rows = [
+        {"day_id": day_id, "project_id": project_id, "xp": xp,
+         "actual_minutes": minutes, "completed_count": count}
+        for (day_id, project_id), (xp, minutes, count) in totals.items()
+        if xp or minutes or count
+    ]
+    if not rows:
+        return
+    stmt = dialect_insert(db, DailyStats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStats.day_id, DailyStats.project_id],
+        set_={
+            "xp": DailyStats.xp + stmt.excluded.xp,
+            "actual_minutes": DailyStats.actual_minutes + stmt.excluded.actual_minutes,
+            "completed_count": DailyStats.completed_count + stmt.excluded.completed_count,
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def rebuild_daily_stats(db, day_ids=None):
+    """Recompute daily_stats from the raw items, archived ones included, for
+    everything or only the given days.
+
+    Returns the number of rollup rows written (caller commits)."""
+    if day_ids is not None:
+        day_ids = sorted({day_id[:10] for day_id in day_ids if day_id})
+        dates = sorted({day_date(day_id) for day_id in day_ids} - {None})
+        if not day_ids:
+            return 0
+
+    def completed(model):
+        day = func.substr(model.day_id, 1, 10)
+        rows = select(
+            day.label("day_id"),
+            func.coalesce(model.project_id, literal("")).label("project_id"),
+            func.coalesce(model.xp_value, 0).label("xp"),
+            func.coalesce(model.actual_duration, 0).label("minutes"),
+        ).where(
+            model.completed_time.isnot(None),
+            model.day_id.isnot(None),
+            or_(model.type.is_(None), model.type != "daily_basic"),
+        )
+        # Served by the date indexes; the rollup stays keyed by the day id string
+        return rows.where(model.date.in_(dates)) if day_ids is not None else rows
+
+    delete = db.query(DailyStats)
+    if day_ids is not None:
+        delete = delete.filter(DailyStats.day_id.in_(day_ids))
+    delete.delete(synchronize_session=False)
+    rows = union_all(completed(Item), completed(ItemArchive)).subquery()
+    source = select(
+        rows.c.day_id, rows.c.project_id, func.sum(rows.c.xp), func.sum(rows.c.minutes), func.count()
+    ).group_by(rows.c.day_id, rows.c.project_id)
+    result = db.execute(
+        DailyStats.__table__.insert().from_select(
+            ["day_id", "project_id", "xp", "actual_minutes", "completed_count"],
+            source,
+        )
+    )
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    # python -m utils.stats  -> rebuild the whole rollup
+    from db import SessionLocal
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_stats(db)
+        db.commit()
+        print(f"daily_stats rebuilt: {rows} rows")
+    finally:
+        db.close()
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import threading
+from anyio import to_thread
+from sqlalchemy import bindparam, update
+from models import Item
+
+# Fields PATCH /items/{id} may buffer: they change often (timer, drag and drop)
+# and never affect XP or daily_stats while the item has no completed_time
+BUFFERED_FIELDS = {"actual_duration", "priority", "planned_time", "column_location"}
+# 0 turns buffering off: PATCH writes through immediately
+FLUSH_INTERVAL_MS = int(os.environ.get("WRITE_BUFFER_MS", 500))
+
+logger = logging.getLogger(__name__)
+
+_pending = {}
+# Batch being written by flush_writes; still overlaid on reads until it commits
+_in_flight = {}
+_lock = threading.Lock()
+# Held for a whole flush. Taking or discarding pending values waits for it, so
+# a running flush never commits older values after the caller's own write.
+_flush_lock = threading.Lock()
+_version = 0
+
+
+def buffer_write(item_id, values):
+    """Merge values into the pending write of item_id (last write wins per field)."""
+    global _version
+    with _lock:
+        _pending.setdefault(item_id, {}).update(values)
+        _version += 1
+
+
+def take_pending(item_id):
+    """Remove and return the pending values of one item, e.g. before a full PUT.
+
+    Call it before writing to the database: it waits for a running flush.
+    """
+    with _flush_lock, _lock:
+        return _pending.pop(item_id, {})
+
+
+def discard_pending(item_ids, fields=None):
+    """Drop the pending values (only those of fields, when given) of items that a
+    bulk update or delete supersedes. Call it before writing, like take_pending."""
+    global _version
+    with _flush_lock, _lock:
+        for item_id in item_ids:
+            values = _pending.get(item_id)
+            if values is None:
+                continue
+            for field in list(values) if fields is None else fields:
+                values.pop(field, None)
+            if not values:
+                del _pending[item_id]
+            _version += 1
+
+
+def pending_writes():
+    """Snapshot of the pending writes and a counter that changes with them (None when empty)."""
+    with _lock:
+        if not _pending and not _in_flight:
+            return {}, None
+        merged = {item_id: dict(values) for item_id, values in _in_flight.items()}
+        for item_id, values in _pending.items():
+            merged.setdefault(item_id, {}).update(values)
+        return merged, _version
+
+
+def overlay(rows, pending):
+    """Apply pending writes to serialized item rows (dicts with at least an id)."""
+    for row in rows:
+        values = pending.get(row["id"])
+        if values:
+            row.update((key, value) for key, value in values.items() if key in row)
+    return rows
+
+
+def flush_writes(session_factory):
+    """Write every pending update in one transaction, one executemany per field set.
+
+    Rows deleted, completed or stopped (completed_time set) in the meantime are
+    skipped. Failed writes go back into the buffer for the fields that have no
+    newer pending value.
+    """
+    with _flush_lock:
+        with _lock:
+            batch = dict(_pending)
+            _pending.clear()
+            _in_flight.update(batch)
+        if not batch:
+            return 0
+        groups = {}
+        for item_id, values in batch.items():
+            groups.setdefault(tuple(sorted(values)), []).append({"item_id": item_id, **values})
+        table = Item.__table__
+        stmt = update(table).where(table.c.id == bindparam("item_id"), table.c.completed.isnot(True),
+                                   table.c.completed_time.is_(None))
+        db = session_factory()
+        try:
+            for rows in groups.values():
+                db.execute(stmt, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with _lock:
+                for item_id, values in batch.items():
+                    _pending[item_id] = {**values, **_pending.get(item_id, {})}
+            raise
+        finally:
+            db.close()
+            with _lock:
+                _in_flight.clear()
+        return len(batch)
+
+
+async def flush_periodically(session_factory):
+    """Flush the buffer every FLUSH_INTERVAL_MS until cancelled, then once more."""
+    try:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_MS / 1000)
+            try:
+                await to_thread.run_sync(flush_writes, session_factory)
+            except Exception:
+                logger.exception("Flushing buffered item writes failed")
+    finally:
+        flush_writes(session_factory)
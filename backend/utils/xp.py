@@ -9,63 +9,277 @@ def calculate_next_level_xp(level):
     """Calculate XP needed for next level using quadratic progression."""
     return 100 * (level + 1) ** 2
 
+# XP = actual_duration / 10 * quality * time quality * priority * penalty
+QUALITY_MULTIPLIERS = {"A": 4, "B": 3, "C": 2, "D": 1}
+TIME_QUALITY_MULTIPLIERS = {"pure": 1.5}
+PRIORITY_MULTIPLIERS = {1: 1.5, 2: 1.4, 3: 1.3}
+# (from, to, multiplier) for actual/estimated duration, bounds inclusive, first match wins:
+# significant underestimation (more than 60% faster) costs 20%, landing within ~10% of the
+# estimate earns 20%, within ~20% earns 10%. No penalty for overwork - tasks often take
+# longer due to unforeseen issues.
+PENALTY_BANDS = [
+    (-math.inf, math.nextafter(0.46534, -math.inf), 0.8),
+    (0.9345, 1.1453, 1.2),
+    (0.8345, 1.2345, 1.1),
+]
+MULTIPLIER_NAMES = ["Quality", "Time Quality", "Priority", "Penalty"]
+
+
+def _enum_value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+def penalty_multiplier(actual_duration, estimated_duration):
+    if not (estimated_duration and actual_duration):
+        return 1.0
+    ratio = actual_duration / estimated_duration
+    for low, high, multiplier in PENALTY_BANDS:
+        if low <= ratio <= high:
+            return multiplier
+    return 1.0
+
+
+def calculate_xp_batch(actual_durations, estimated_durations, task_qualities, time_qualities, priorities):
+    """XP for many items at once from parallel columns (one list per input field).
+
+    Returns a dict of equally long columns: base_xp, quality, time_quality,
+    priority, penalty and total_xp. Every element is computed with exactly the
+    same operations as calculate_xp(), so results are bit-identical.
+    """
+    quality_get = QUALITY_MULTIPLIERS.get
+    time_quality_get = TIME_QUALITY_MULTIPLIERS.get
+    priority_get = PRIORITY_MULTIPLIERS.get
+    floor = math.floor
+
+    base = [duration / 10 if duration is not None else 0 for duration in actual_durations]
+    quality = [quality_get(_enum_value(value), 1) for value in task_qualities]
+    time_quality = [time_quality_get(_enum_value(value), 1.0) for value in time_qualities]
+    priority = [priority_get(value, 1.0) for value in priorities]
+    penalty = list(map(penalty_multiplier, actual_durations, estimated_durations))
+    total = [
+        floor(b * q * t * p * n)
+        for b, q, t, p, n in zip(base, quality, time_quality, priority, penalty)
+    ]
+    return {
+        "base_xp": base,
+        "quality": quality,
+        "time_quality": time_quality,
+        "priority": priority,
+        "penalty": penalty,
+        "total_xp": total,
+    }
+
+
 def calculate_xp(actual_duration, estimated_duration, task_quality, time_quality, priority, created_time=None, completed_time=None):
-    base_xp = actual_duration / 10
+    return calculate_xp_batch(
+        [actual_duration], [estimated_duration], [task_quality], [time_quality], [priority]
+    )["total_xp"][0]
+
+
+def breakdowns_from_batch(columns):
+    """Turn calculate_xp_batch() columns into get_xp_breakdown()-shaped dicts."""
+    return [
+        {
+            "base_xp": base,
+            "multipliers": [
+                {"name": name, "value": value}
+                for name, value in zip(MULTIPLIER_NAMES, multipliers)
+            ],
+            "total_xp": total,
+        }
+        for base, total, *multipliers in zip(
+            columns["base_xp"], columns["total_xp"], columns["quality"],
+            columns["time_quality"], columns["priority"], columns["penalty"],
+        )
+    ]
+
+
+def update_project_xp(project_id, xp_to_add, actual_duration, db):
+    """Add xp_to_add to a project and all of its ancestors.
+
+    One UPDATE over the ancestor chain plus one bulk UPDATE for levels; the
+    caller commits. Returns the updated projects as dicts.
+    """
+    from sqlalchemy import update, func
+    from models import Project
+    from utils.projects import ancestor_ids
 
-    quality_map = {"A": 4, "B": 3, "C": 2, "D": 1}
-    quality_multiplier = quality_map.get(task_quality, 1)
+    result = db.execute(
+        update(Project)
+        .where(Project.id.in_(ancestor_ids(project_id)))
+        .values(current_xp=func.coalesce(Project.current_xp, 0) + xp_to_add)
+        .returning(Project.id, Project.current_xp)
+        .execution_options(synchronize_session=False)
+    )
+    updated = []
+    for project_id, current_xp in result.all():
+        level = calculate_level_from_xp(current_xp)
+        updated.append({
+            "id": project_id,
+            "current_xp": current_xp,
+            "current_level": level,
+            "next_level_xp": calculate_next_level_xp(level),
+        })
+    if updated:
+        db.execute(
+            update(Project),
+            [{key: row[key] for key in ("id", "current_level", "next_level_xp")} for row in updated],
+        )
+    return updated
 
-    time_quality_multiplier = 1.5 if time_quality == "pure" else 1.0
+def merge_projects(updated, projects):
+    """Collect update_project_xp() results by id, keeping the latest values."""
+    for project in projects:
+        updated[project["id"]] = project
+    return updated
 
-    if priority == 1:
-        priority_multiplier = 1.5
-    elif priority == 2:
-        priority_multiplier = 1.4
-    elif priority == 3:
-        priority_multiplier = 1.3
+
+def apply_item_xp(item, db):
+    """Credit an item's XP to its project tree by difference with what it already credited.
+
+    Re-saving a completed item therefore adds nothing, un-completing it or
+    moving it to another project moves the credit. Returns updated projects.
+    """
+    target = (item.xp_value or 0) if item.completed and item.project_id else 0
+    credited = item.xp_credited or 0
+    updated = {}
+    if item.credited_project_id and item.credited_project_id == item.project_id:
+        if target != credited:
+            merge_projects(updated, update_project_xp(item.project_id, target - credited, item.actual_duration, db))
     else:
-        priority_multiplier = 1.0
-
-    # Penalty for time difference
-    penalty_multiplier = 1.0
-    if estimated_duration and actual_duration:
-        ratio = actual_duration / estimated_duration
-        
-        # Only penalize significant underestimation (more than 60% faster than estimated)
-        if ratio < 0.46534:  # More than 60% faster than estimated
-            penalty_multiplier = 0.8  # 20% penalty
-        elif 0.9345 <= ratio <= 1.1453:  
-            penalty_multiplier = 1.2  
-        elif 0.8345 <= ratio <= 1.2345:  # Within 20% of estimate
-            penalty_multiplier = 1.1  # 10% bonus for accuracy
-        # No penalty for overwork - tasks often take longer due to unforeseen issues
-
-    # Remove created_multiplier logic entirely
-    # Calculate final XP
-    xp = base_xp * quality_multiplier * time_quality_multiplier * priority_multiplier * penalty_multiplier
-    return math.floor(xp)
+        if credited and item.credited_project_id:
+            merge_projects(updated, update_project_xp(item.credited_project_id, -credited, item.actual_duration, db))
+        if target:
+            merge_projects(updated, update_project_xp(item.project_id, target, item.actual_duration, db))
+    item.xp_credited = target
+    item.credited_project_id = item.project_id if target else None
+    return list(updated.values())
 
 
-def update_project_xp(project_id, xp_to_add, actual_duration, db):
-    from models import Project  # Updated import
-    
-    # Get project and update XP
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        return
-    
-    # Update XP and calculate new level
-    project.current_xp += xp_to_add
-    new_level = calculate_level_from_xp(project.current_xp)
-    project.current_level = new_level
-    project.next_level_xp = calculate_next_level_xp(new_level)
-    
-    # Update parent project if exists
-    if project.parent_id:
-        update_project_xp(project.parent_id, xp_to_add, actual_duration, db)
-    
-    db.commit()
-    return project
+def release_items_xp(db, condition, model=None):
+    """Take the XP credited by all items matching condition back out of their project
+    trees, one ancestor-chain update per distinct project. Returns updated projects.
+
+    model=ItemArchive does the same for archived items."""
+    from sqlalchemy import func
+    from models import Item
+    model = model or Item
+
+    rows = (
+        db.query(model.credited_project_id, func.sum(model.xp_credited))
+        .filter(condition, model.credited_project_id.isnot(None))
+        .group_by(model.credited_project_id)
+        .all()
+    )
+    updated = {}
+    for project_id, xp in rows:
+        if xp:
+            merge_projects(updated, update_project_xp(project_id, -xp, None, db))
+    if rows:
+        db.query(model).filter(condition).update(
+            {model.xp_credited: 0, model.credited_project_id: None}, synchronize_session=False
+        )
+    return list(updated.values())
+
+
+def credit_items_xp(db, condition, model=None):
+    """Credit completed items matching condition that have nothing credited yet
+    (credited_project_id is NULL) to their project trees, one ancestor-chain
+    update per distinct project. Returns updated projects.
+
+    model=ItemArchive does the same for archived items."""
+    from sqlalchemy import func
+    from models import Item
+    model = model or Item
+
+    credit = (
+        model.completed.is_(True), model.project_id.isnot(None), model.credited_project_id.is_(None),
+        func.coalesce(model.xp_value, 0) != 0,
+    )
+    rows = (
+        db.query(model.project_id, func.sum(model.xp_value))
+        .filter(condition, *credit)
+        .group_by(model.project_id)
+        .all()
+    )
+    updated = {}
+    for project_id, xp in rows:
+        merge_projects(updated, update_project_xp(project_id, xp, None, db))
+    if rows:
+        db.query(model).filter(condition, *credit).update(
+            {model.xp_credited: model.xp_value, model.credited_project_id: model.project_id},
+            synchronize_session=False,
+        )
+    return list(updated.values())
+
+
+def recompute_all_xp(db, chunk_size=1000):
+    """Recompute every item's XP and every project's XP/level from scratch.
+
+    Items are read in id-ordered chunks and written back with one bulk UPDATE
+    per chunk, so memory stays bounded by chunk_size plus one number per
+    project; the project rollup is one aggregate over project_closure. The
+    caller commits.
+    """
+    from sqlalchemy import update, func, select, union_all
+    from models import Item, ItemArchive, Project, ProjectClosure
+
+    scanned = changed = 0
+    last_id = None
+    while True:
+        query = db.query(
+            Item.id, Item.actual_duration, Item.estimated_duration, Item.task_quality,
+            Item.time_quality, Item.priority, Item.completed, Item.type, Item.project_id,
+            Item.xp_value, Item.xp_credited, Item.credited_project_id,
+        )
+        if last_id is not None:
+            query = query.filter(Item.id > last_id)
+        rows = query.order_by(Item.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+        updates = []
+        formula_xp = calculate_xp_batch(
+            *([getattr(row, key) for row in rows]
+              for key in ("actual_duration", "estimated_duration", "task_quality", "time_quality", "priority"))
+        )["total_xp"]
+        for row, calculated in zip(rows, formula_xp):
+            xp = row.xp_value
+            if row.completed and row.type == "daily_basic":
+                xp = 0
+            elif row.completed and row.type != "bonus":
+                xp = calculated
+            target = (xp or 0) if row.completed and row.project_id else 0
+            credited_project_id = row.project_id if target else None
+            if (xp, target, credited_project_id) != (row.xp_value, row.xp_credited or 0, row.credited_project_id):
+                updates.append({"id": row.id, "xp_value": xp, "xp_credited": target,
+                                "credited_project_id": credited_project_id})
+        if updates:
+            db.execute(update(Item), updates)
+            changed += len(updates)
+
+    # Every project gets its own XP plus its descendants', summed over project_closure in one query.
+    # Archived items keep the XP they were credited with.
+    credits = union_all(*(
+        select(model.credited_project_id.label("project_id"), model.xp_credited.label("xp"))
+        .where(model.credited_project_id.isnot(None))
+        for model in (Item, ItemArchive)
+    )).subquery()
+    totals = dict.fromkeys((project_id for (project_id,) in db.query(Project.id)), 0)
+    totals.update(
+        db.query(ProjectClosure.ancestor_id, func.sum(credits.c.xp))
+        .join(credits, credits.c.project_id == ProjectClosure.descendant_id)
+        .group_by(ProjectClosure.ancestor_id)
+    )
+    project_rows = []
+    for project_id, xp in totals.items():
+        level = calculate_level_from_xp(xp)
+        project_rows.append({"id": project_id, "current_xp": xp, "current_level": level,
+                             "next_level_xp": calculate_next_level_xp(level)})
+    if project_rows:
+        db.execute(update(Project), project_rows)
+    return {"items_scanned": scanned, "items_updated": changed, "projects_updated": len(project_rows)}
 
 def get_xp_breakdown(task):
     """
@@ -76,67 +290,18 @@ def get_xp_breakdown(task):
         'total_xp': int
     }
     """
+    return get_xp_breakdowns([task])[0]
+
+
+def get_xp_breakdowns(tasks):
+    """get_xp_breakdown() for a list of task objects/dicts, computed as one batch."""
     def get_field(obj, key):
         if isinstance(obj, dict):
-            val = obj.get(key)
-        else:
-            val = getattr(obj, key, None)
-        # If it's an Enum, get its value
-        if hasattr(val, 'value'):
-            return val.value
-        return val
-
-    actual_duration = get_field(task, 'actual_duration')
-    estimated_duration = get_field(task, 'estimated_duration')
-    task_quality = get_field(task, 'task_quality')
-    time_quality = get_field(task, 'time_quality')
-    priority = get_field(task, 'priority')
-    created_time = get_field(task, 'created_time')
-    completed_time = get_field(task, 'completed_time')
-
-    base_xp = actual_duration / 10 if actual_duration is not None else 0
-
-    quality_map = {"A": 4, "B": 3, "C": 2, "D": 1}
-    quality_multiplier = quality_map.get(task_quality, 1)
-
-    time_quality_multiplier = 1.5 if time_quality == "pure" else 1.0
-
-    if priority == 1:
-        priority_multiplier = 1.5
-    elif priority == 2:
-        priority_multiplier = 1.4
-    elif priority == 3:
-        priority_multiplier = 1.3
-    else:
-        priority_multiplier = 1.0
-
-    # Penalty for time difference
-    penalty_multiplier = 1.0
-    if estimated_duration and actual_duration:
-        ratio = actual_duration / estimated_duration
-        
-        # Only penalize significant underestimation (more than 60% faster than estimated)
-        if ratio < 0.46534:  # More than 60% faster than estimated
-            penalty_multiplier = 0.8  # 20% penalty
-        elif 0.9345 <= ratio <= 1.1453:  
-            penalty_multiplier = 1.2  
-        elif 0.8345 <= ratio <= 1.2345:  # Within 20% of estimate
-            penalty_multiplier = 1.1  # 10% bonus for accuracy
-        # No penalty for overwork - tasks often take longer due to unforeseen issues
-
-    # New: Multiplier for tasks not created on the same day as completed
-    # Remove created_multiplier logic entirely
-    multipliers = [
-        {"name": "Quality", "value": quality_multiplier},
-        {"name": "Time Quality", "value": time_quality_multiplier},
-        {"name": "Priority", "value": priority_multiplier},
-        {"name": "Penalty", "value": penalty_multiplier},
-        # Removed Created Not Today
-    ]
+            return obj.get(key)
+        return getattr(obj, key, None)
 
-    total_xp = base_xp * quality_multiplier * time_quality_multiplier * priority_multiplier * penalty_multiplier
-    return {
-        "base_xp": base_xp,
-        "multipliers": multipliers,
-        "total_xp": math.floor(total_xp)
-    }
+    columns = calculate_xp_batch(
+        *([get_field(task, key) for task in tasks]
+          for key in ("actual_duration", "estimated_duration", "task_quality", "time_quality", "priority"))
+    )
+    return breakdowns_from_batch(columns)
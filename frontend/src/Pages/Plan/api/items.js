@@ -10,33 +10,27 @@ export function handleAddTask(item, setItems) {
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(itemToSend)
   })
-    .then(res => res.json())
+    // 409: a bonus that another tab already claimed today
+    .then(res => res.ok ? res.json() : null)
     .then(data => {
-      setItems(items => [...items, data]);
+      if (data) setItems(items => [...items, data]);
     });
 }
 
 export function handleDeleteTask(taskId, setItems, options = {}) {
   setItems(items => {
-    // If options.deleteAllPlanChildren is true, delete all children in the plan column, regardless of day
-    let children = [];
-    if (options.deleteAllPlanChildren) {
-      children = items.filter(item => item.parent_id === taskId && item.column_location === 'plan');
-    } else {
-      // Default: only today's children
-      const today = new Date().toISOString().slice(0, 10);
-      children = items.filter(item =>
-        item.parent_id === taskId &&
-        item.column_location === 'plan' &&
-        (item.day_id || '').slice(0, 10) === today
-      );
+    // Delete parent and its plan children in one backend transaction.
+    // If options.deleteAllPlanChildren is true, delete all children in the plan column, regardless of day;
+    // default: only today's children
+    const childrenOf = { parent_id: taskId, column_location: 'plan' };
+    if (!options.deleteAllPlanChildren) {
+      childrenOf.day_id = new Date().toISOString().slice(0, 10);
     }
-    // Delete each child from backend
-    children.forEach(child => {
-      fetch(`${API_URL}/items/${child.id}`, { method: 'DELETE' });
+    fetch(`${API_URL}/items/bulk/delete`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ ids: [taskId], children_of: childrenOf })
     });
-    // Delete parent from backend
-    fetch(`${API_URL}/items/${taskId}`, { method: 'DELETE' });
     // Remove parent and relevant plan children from local state
     const newItems = items.filter(item =>
       item.id !== taskId &&
@@ -55,21 +49,9 @@ export function handleUpdateTask(updatedTask, setItems, updateItemsState, setPro
     body: JSON.stringify(itemToSend)
   })
     .then(res => res.json())
-    .then(data => {
+    .then(({ updated_projects, ...data }) => {
       updateItemsState(data);
-      if (data.completed) {
-        return fetch(`${API_URL}/projects`);
-      }
-    })
-    .then(res => {
-      if (res) {
-        return res.json();
-      }
-    })
-    .then(projectsData => {
-      if (projectsData) {
-        setProjects(projectsData);
-      }
+      applyUpdatedProjects(updated_projects, setProjects);
     })
     .catch(error => {
       console.error('Error updating task:', error);
@@ -85,25 +67,28 @@ export function handleCompleteTask(updatedTask, updateItemsState, setProjects, i
     body: JSON.stringify(itemToSend)
   })
     .then(res => res.json())
-    .then(async data => {
+    .then(async ({ updated_projects, ...data }) => {
       updateItemsState(data);
+      applyUpdatedProjects(updated_projects, setProjects);
       // Call checkAndTriggerBonus after the real task is added to the items list
       if (items && onAddTask && showPopup) {
         // Compose the new items list with the just-completed real task
         const updatedItems = [...items.filter(i => i.id !== data.id), data];
         await checkAndTriggerBonus({ items: updatedItems, onAddTask, showPopup });
       }
-      return fetch(`${API_URL}/projects`);
-    })
-    .then(res => res.json())
-    .then(projectsData => {
-      setProjects(projectsData);
     })
     .catch(error => {
       console.error('Error completing task:', error);
     });
 }
 
+// Merge the ancestor XP/levels returned by PUT /items/{id} into the project list
+function applyUpdatedProjects(updatedProjects, setProjects) {
+  if (!updatedProjects || updatedProjects.length === 0) return;
+  const byId = Object.fromEntries(updatedProjects.map(project => [project.id, project]));
+  setProjects(projects => projects.map(project => (byId[project.id] ? { ...project, ...byId[project.id] } : project)));
+}
+
 export function updateItemsState(data, setItems) {
   setItems(items => {
     const idx = items.findIndex(item => item.id === data.id);
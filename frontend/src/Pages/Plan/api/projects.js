@@ -44,16 +44,13 @@ export function handleUpdateProject(updatedProject, setProjects) {
 export function handleDeleteProject(projectId, projects, setProjects, setSelectedProjectIds, getDescendantProjectIds) {
   const descendantIds = getDescendantProjectIds(projects, projectId);
   const allIdsToDelete = [projectId, ...descendantIds];
-  const deletePromises = allIdsToDelete.map(id => 
-    fetch(`${API_URL}/projects/${id}`, {
-      method: 'DELETE',
-      headers: { 'Content-Type': 'application/json' }
-    })
-  );
-  Promise.all(deletePromises)
-    .then(responses => {
-      const allSuccessful = responses.every(res => res.ok);
-      if (allSuccessful) {
+  // The backend deletes the whole subtree in one request
+  fetch(`${API_URL}/projects/${projectId}`, {
+    method: 'DELETE',
+    headers: { 'Content-Type': 'application/json' }
+  })
+    .then(res => {
+      if (res.ok) {
         setProjects(projects => projects.filter(p => !allIdsToDelete.includes(p.id)));
         setSelectedProjectIds(current => {
           const newSelection = current.map(id => 
@@ -62,7 +59,7 @@ export function handleDeleteProject(projectId, projects, setProjects, setSelecte
           return newSelection;
         });
       } else {
-        console.error('Some project deletions failed');
+        console.error('Project deletion failed');
       }
     })
     .catch(error => {
@@ -11,28 +11,21 @@ function getLast7Days() {
   return days;
 }
 
-export async function fetchXPForLast7Days() {
-  const res = await fetch(`${API_URL}/items`);
-  const items = await res.json();
+async function fetchDailyStatsForLast7Days() {
   const days = getLast7Days();
-  return days.map(day => {
-    const xp = items
-      .filter(item => (item.day_id || '').slice(0, 10) === day && item.completed_time)
-      .reduce((sum, item) => sum + (item.xp_value || 0), 0);
-    return { day, xp };
-  });
+  const res = await fetch(`${API_URL}/stats/daily?from=${days[0]}&to=${days[days.length - 1]}`);
+  if (!res.ok) throw new Error('Failed to fetch daily stats');
+  return res.json();
+}
+
+export async function fetchXPForLast7Days() {
+  const stats = await fetchDailyStatsForLast7Days();
+  return stats.map(({ day, xp }) => ({ day, xp }));
 }
 
 export async function fetchXPAndActualForLast7Days() {
-  const res = await fetch(`${API_URL}/items`);
-  const items = await res.json();
-  const days = getLast7Days();
-  return days.map(day => {
-    const dayItems = items.filter(item => (item.day_id || '').slice(0, 10) === day && item.completed_time && item.type !== 'daily_basic');
-    const xp = dayItems.reduce((sum, item) => sum + (item.xp_value || 0), 0);
-    const actual = dayItems.reduce((sum, item) => sum + (item.actual_duration || 0), 0);
-    return { day, xp, actual };
-  });
+  const stats = await fetchDailyStatsForLast7Days();
+  return stats.map(({ day, xp, actual }) => ({ day, xp, actual }));
 }
 
 export async function fetchStatisticsData() {
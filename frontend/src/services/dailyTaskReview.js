@@ -79,17 +79,16 @@ class DailyTaskReviewService {
   // Fetch yesterday's uncompleted plan tasks
   async fetchYesterdayTasks(yesterdayStr) {
     try {
-      const response = await fetch(`${API_URL}/items`);
+      const params = new URLSearchParams({ day_from: yesterdayStr, day_to: yesterdayStr, column_location: 'plan' });
+      const response = await fetch(`${API_URL}/items?${params}`);
       if (!response.ok) {
         throw new Error('Failed to fetch items');
       }
       
-      const allItems = await response.json();
+      const dayItems = await response.json();
       
-      // Filter for yesterday's plan tasks that weren't completed (excluding daily basics)
-      const yesterdayPlanTasks = allItems.filter(item => 
-        item.day_id === yesterdayStr &&
-        item.column_location === 'plan' &&
+      // Yesterday's plan tasks that weren't completed (excluding daily basics)
+      const yesterdayPlanTasks = dayItems.filter(item => 
         !item.completed_time &&
         item.type !== 'daily_basic'
       );
@@ -165,71 +164,21 @@ class DailyTaskReviewService {
     }
   }
 
-  // Check for today's planning bonus
+  // Check for today's planning bonus (evaluated by the backend, awarded at most once per day)
   async checkTodayPlanningBonus() {
     try {
-      const response = await fetch(`${API_URL}/items`);
-      if (!response.ok) {
-        throw new Error('Failed to fetch items');
-      }
-      
-      const allItems = await response.json();
       const today = getTodayDateString();
-      
-      // Check if today has 18+ hours (1080 minutes) planned
-      const todayPlanTasks = allItems.filter(item => 
-        item.day_id === today &&
-        item.column_location === 'plan' &&
-        item.type !== 'daily_basic'
-      );
-      
-      const todayPlannedMinutes = todayPlanTasks.reduce((sum, item) => sum + (item.estimated_duration || 0), 0);
-      const has18HoursPlanned = todayPlannedMinutes >= 1080; // 18 hours = 1080 minutes
-      
-      if (!has18HoursPlanned) {
-        return; // Not enough planning
-      }
-      
-      // Check if this bonus was already given today
-      const hasBonusToday = allItems.some(item => 
-        item.type === 'bonus' && 
-        item.day_id === today && 
-        item.description === 'today_well_planned_not_sunday'
-      );
-      
-      if (hasBonusToday) {
-        return; // Bonus already given
-      }
-      
-      // Check if today was planned on Sunday
-      const todayDate = new Date(today);
-      const isTodaySunday = todayDate.getDay() === 0;
-      
-      if (isTodaySunday) {
-        return; // Can't get bonus if today is Sunday
+      const response = await fetch(`${API_URL}/days/${today}/summary`);
+      if (!response.ok) {
+        throw new Error('Failed to fetch day summary');
       }
       
-      // Check if any of today's plan tasks were created on Sunday
-      const dayOfWeek = todayDate.getDay(); // 0 = Sunday, 1 = Monday, etc.
-      
-      // Get the date of the most recent Sunday
-      const sunday = new Date(todayDate);
-      sunday.setDate(todayDate.getDate() - dayOfWeek);
-      const sundayStr = toLocalDateString(sunday);
-      
-      const plannedOnSunday = todayPlanTasks.some(task => {
-        if (!task.created_time) return false;
-        const createdDate = new Date(task.created_time);
-        const createdDateStr = toLocalDateString(createdDate);
-        return createdDateStr === sundayStr;
-      });
-      
-      if (plannedOnSunday) {
-        return; // Some tasks were planned on Sunday
+      const { planning_bonus: planningBonus } = await response.json();
+      if (!planningBonus.eligible || planningBonus.awarded) {
+        return;
       }
       
-      // All conditions met! Give the bonus
-      const bonus = getBonusById('today_well_planned_not_sunday');
+      const bonus = getBonusById(planningBonus.id);
       if (bonus && this.onShowBonusPopup) {
         this.onShowBonusPopup(bonus);
       }
@@ -79,10 +79,6 @@ export async function getLocalXP(forceRefresh = false) {
 }
 
 export async function fetchAndCacheLast7DaysXP() {
-  const res = await fetch(`${API_URL}/items`);
-  if (!res.ok) throw new Error('Failed to fetch items');
-  const items = await res.json();
-
   const days = [];
   const today = new Date();
   for (let i = 6; i >= 0; i--) {
@@ -90,12 +86,10 @@ export async function fetchAndCacheLast7DaysXP() {
     d.setDate(today.getDate() - i);
     days.push(d.toISOString().slice(0, 10));
   }
-  const xpData = days.map(day => {
-    const xp = items
-      .filter(item => (item.day_id || '').slice(0, 10) === day && item.completed_time)
-      .reduce((sum, item) => sum + (item.xp_value || 0), 0);
-    return { day, xp };
-  });
+  const res = await fetch(`${API_URL}/stats/daily?from=${days[0]}&to=${days[days.length - 1]}`);
+  if (!res.ok) throw new Error('Failed to fetch daily stats');
+  const stats = await res.json();
+  const xpData = stats.map(({ day, xp }) => ({ day, xp }));
 
   setLocalXP(xpData);
   return xpData;